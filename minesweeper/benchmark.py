@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "data", "corpus.json")
+
+# Board configurations (height, width, mines) included in the corpus
+CONFIGURATIONS = [(8, 8, 8), (9, 9, 10), (16, 16, 40)]
+BOARDS_PER_CONFIGURATION = 40
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check MinesweeperAI deductions against a corpus of "
+                    "boards with known forced safes and mines."
+    )
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument(
+        "--generate", action="store_true",
+        help="regenerate the corpus instead of running the benchmark"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solver", choices=["subset", "linear"],
+                        default="subset")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="only use the first LIMIT boards")
+    parser.add_argument("--min-recall", type=float, default=0,
+                        help="fail if fewer forced cells are found")
+    args = parser.parse_args()
+
+    if args.generate:
+        boards = generate_corpus(args.seed)
+        with open(args.corpus, "w") as f:
+            json.dump({"seed": args.seed, "boards": boards}, f,
+                      separators=(",", ":"))
+        print(f"Wrote {len(boards)} boards to {args.corpus}")
+        return
+
+    with open(args.corpus) as f:
+        boards = json.load(f)["boards"][:args.limit]
+    results = benchmark(boards, args.solver)
+    print(json.dumps(results, indent=2))
+
+    if results["unsound"]:
+        sys.exit("AI deduced cells that are not forced.")
+    if results["recall"] < args.min_recall:
+        sys.exit(f"Recall {results['recall']:.4f} is below {args.min_recall}.")
+
+
+def generate_corpus(seed):
+    """
+    Generate the boards of the corpus. Board `k` is generated with seed
+    `seed + k`, so the corpus can be reproduced exactly.
+    """
+    boards = []
+    for height, width, mines in CONFIGURATIONS:
+        for _ in range(BOARDS_PER_CONFIGURATION):
+            boards.append(generate_board(seed + len(boards),
+                                         height, width, mines))
+    return boards
+
+
+def generate_board(seed, height, width, mines):
+    """
+    Create a game and reveal a random number of safe cells, growing
+    outwards from a random first safe cell the way a player would.
+
+    Return a dictionary describing the board: its size, the revealed cells
+    in order with their counts, and the unrevealed cells that the counts
+    force to be safe or to be mines.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    neighbors = MinesweeperAI(height, width, mines).neighbors
+
+    safe_cells = [
+        (i, j) for i in range(height) for j in range(width)
+        if (i, j) not in game.mines
+    ]
+    target = random.randint(1, len(safe_cells) * 3 // 5)
+
+    revealed = []
+    seen = set()
+    candidates = [random.choice(safe_cells)]
+    while len(revealed) < target and candidates:
+        cell = candidates.pop(random.randrange(len(candidates)))
+        if cell in seen:
+            continue
+        seen.add(cell)
+        revealed.append(cell)
+        candidates.extend(
+            neighbor for neighbor in neighbors[cell]
+            if neighbor not in seen and neighbor not in game.mines
+        )
+
+    reveals = [[i, j, game.nearby_mines((i, j))] for i, j in revealed]
+    safes, mines_forced = forced_cells(reveals, neighbors)
+    return {
+        "seed": seed,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "reveals": reveals,
+        "safes": sorted([i, j] for i, j in safes),
+        "forced_mines": sorted([i, j] for i, j in mines_forced)
+    }
+
+
+def forced_cells(reveals, neighbors):
+    """
+    Given revealed cells and their counts, return the sets of unrevealed
+    cells that are safe, and that are mines, in every arrangement of mines
+    consistent with the counts.
+
+    This exhaustively enumerates the arrangements of each group of cells
+    linked by shared counts, independently of the AI's own inference code.
+    """
+    revealed = set((i, j) for i, j, _ in reveals)
+    constraints = []
+    for i, j, count in reveals:
+        cells = [n for n in neighbors[(i, j)] if n not in revealed]
+        if cells:
+            constraints.append((cells, count))
+
+    # Group cells that share a constraint.
+    group = dict()
+    for cells, _ in constraints:
+        merged = set(cells)
+        for cell in cells:
+            if cell in group:
+                merged |= group[cell]
+        for cell in merged:
+            group[cell] = merged
+
+    safes = set()
+    mines = set()
+    for cells in {id(g): g for g in group.values()}.values():
+        relevant = [c for c in constraints if c[0][0] in cells]
+        can_be_safe = set()
+        can_be_mine = set()
+        for assignment in arrangements(sorted(cells), relevant):
+            for cell, value in assignment.items():
+                if value:
+                    can_be_mine.add(cell)
+                else:
+                    can_be_safe.add(cell)
+        safes |= cells - can_be_mine
+        mines |= cells - can_be_safe
+
+    return safes, mines
+
+
+def arrangements(cells, constraints):
+    """
+    Yield every assignment of 0 (safe) or 1 (mine) to `cells`, as a
+    dictionary, that satisfies all `(cells, count)` constraints.
+    """
+    assignment = dict()
+    involved = {cell: [] for cell in cells}
+    for constraint in constraints:
+        for cell in constraint[0]:
+            involved[cell].append(constraint)
+
+    def consistent(cell):
+        for constraint_cells, count in involved[cell]:
+            mines = sum(assignment.get(c, 0) for c in constraint_cells)
+            unassigned = sum(c not in assignment for c in constraint_cells)
+            if mines > count or mines + unassigned < count:
+                return False
+        return True
+
+    def backtrack(k):
+        if k == len(cells):
+            yield dict(assignment)
+            return
+        for value in (0, 1):
+            assignment[cells[k]] = value
+            if consistent(cells[k]):
+                yield from backtrack(k + 1)
+            del assignment[cells[k]]
+
+    yield from backtrack(0)
+
+
+def benchmark(boards, solver="subset"):
+    """
+    Replay the reveals of each board into a new AI and compare the cells
+    it deduces with the forced cells of the board.
+
+    Return a dictionary with the number of forced cells found and missed,
+    the number of unsound deductions, and the time per call to
+    `add_knowledge` in milliseconds.
+    """
+    found = 0
+    missed = 0
+    unsound = 0
+    times = []
+
+    for board in boards:
+        ai = MinesweeperAI(board["height"], board["width"], board["mines"],
+                           solver=solver)
+        for i, j, count in board["reveals"]:
+            start = time.perf_counter()
+            ai.add_knowledge((i, j), count)
+            times.append(time.perf_counter() - start)
+
+        safes = set(map(tuple, board["safes"]))
+        mines = set(map(tuple, board["forced_mines"]))
+        deduced_safes = ai.safes - ai.moves_made
+        found += len(deduced_safes & safes) + len(ai.mines & mines)
+        missed += len(safes - deduced_safes) + len(mines - ai.mines)
+        unsound += len(deduced_safes - safes) + len(ai.mines - mines)
+
+    times.sort()
+    return {
+        "solver": solver,
+        "boards": len(boards),
+        "inferences": len(times),
+        "found": found,
+        "missed": missed,
+        "unsound": unsound,
+        "recall": found / (found + missed) if found + missed else 1,
+        "time_ms": {
+            "mean": 1000 * sum(times) / len(times) if times else 0,
+            "p50": 1000 * times[len(times) // 2] if times else 0,
+            "max": 1000 * times[-1] if times else 0
+        }
+    }
+
+
+if __name__ == "__main__":
+    main()
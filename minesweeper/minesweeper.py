@@ -1,6 +1,10 @@
 import itertools
+import math
 import random
 import copy
+import time
+
+import numpy as np
 
 
 class Minesweeper():
@@ -16,20 +20,22 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = np.zeros((height, width), dtype=bool)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i, j] = True
+
+        # Precompute the number of mines around every cell
+        padded = np.pad(self.board, 1).astype(np.int8)
+        self.counts = sum(
+            padded[1 + di:1 + di + height, 1 + dj:1 + dj + width]
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            if (di, dj) != (0, 0)
+        )
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -42,7 +48,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i, j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -51,7 +57,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -60,23 +66,7 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -123,6 +113,7 @@ class Sentence():
         """
         if cell in self.cells:
             self.cells.remove(cell)
+            self.count -= 1
 
     def mark_safe(self, cell):
         """
@@ -133,17 +124,84 @@ class Sentence():
             self.cells.remove(cell)
 
 
+class CellPool():
+    """
+    Set of cells stored in a list, so that a random member can be chosen in
+    constant time. Cells are removed by swapping them with the last cell.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = []
+        self.index = dict()
+        for cell in cells:
+            self.add(cell)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        """
+        Adds `cell` to the pool, unless it is already a member.
+        """
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """
+        Removes `cell` from the pool if it is a member.
+        """
+        k = self.index.pop(cell, None)
+        if k is None:
+            return
+        last = self.cells.pop()
+        if k < len(self.cells):
+            self.cells[k] = last
+            self.index[last] = k
+
+    def peek(self):
+        """
+        Returns any cell in the pool, or None if it is empty.
+        """
+        return self.cells[-1] if self.cells else None
+
+    def choice(self):
+        """
+        Returns a random cell in the pool, or None if it is empty.
+        """
+        return random.choice(self.cells) if self.cells else None
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, solver="subset"):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Inference rule used by add_knowledge: "subset" compares pairs of
+        # sentences, "linear" reduces all sentences together.
+        if solver not in ("subset", "linear"):
+            raise ValueError(f"Unknown solver {solver!r}")
+        self.solver = solver
+
+        # Total number of mines on the board
+        self.total_mines = mines
+
+        # Precompute every cell and the neighbors of each cell
+        self.cells = [(i, j) for i in range(height) for j in range(width)]
+        self.neighbors = neighbor_table(height, width)
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -151,6 +209,11 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Cells that have not been chosen and are not known to be mines, and
+        # safe cells that have not been chosen yet
+        self.unknown = CellPool(self.cells)
+        self.pending_safes = CellPool()
+
         # Optimization: list of checked subsets.
         self.checked_subsets = []
 
@@ -163,6 +226,7 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
+        self.unknown.discard(cell)
         for sentence in self.knowledge:
             sentence.mark_mine(cell)
 
@@ -172,6 +236,8 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
+        if cell not in self.moves_made:
+            self.pending_safes.add(cell)
         for sentence in self.knowledge:
             sentence.mark_safe(cell)
 
@@ -182,6 +248,8 @@ class MinesweeperAI():
         """
         # Mark the cell as a move that has been made.
         self.moves_made.add(cell)
+        self.unknown.discard(cell)
+        self.pending_safes.discard(cell)
         # Mark the cell as safe, updating any sentences that contain the
         # `cell` as well.
         self.mark_safe(cell)
@@ -192,11 +260,11 @@ class MinesweeperAI():
         # Add a new sentence to the AI's knowledge base based on the value of
         # `cell` and `count`.
         cells = set()
-        for i in [cell[0]-1, cell[0], cell[0]+1]:
-            for j in [cell[1]-1, cell[1], cell[1]+1]:
-                if 8 > i >= 0 and 8 > j >= 0:
-                    if (i, j) not in self.safes and (i, j) not in self.mines and (i, j) != cell:
-                        cells.add((i, j))
+        for neighbor in self.neighbors[cell]:
+            if neighbor in self.mines:
+                count -= 1
+            elif neighbor not in self.safes:
+                cells.add(neighbor)
         self.knowledge.append(Sentence(cells, count))
 
         # Mark any additional cells as safe or as mines if it can be concluded
@@ -206,18 +274,16 @@ class MinesweeperAI():
                 for cell in sentence.known_safes().copy():
                     self.mark_safe(cell)
         
-        # If 8 moves left, they must be the mines, since there are always 8 mines.
-        moves = set()
-        for i in range(self.width):
-            for j in range(self.height):
-                moves.add((i, j))
-        
-        moves_left = moves - self.moves_made
-
-        if len(moves_left) == 8:
-            for cell in moves_left:
+        # If only as many moves are left as there are mines, they must all be
+        # mines.
+        if len(self.cells) - len(self.moves_made) == self.total_mines:
+            for cell in list(self.unknown):
                 self.mark_mine(cell)
 
+        if self.solver == "linear":
+            self.linear_inference()
+            return
+
         knowledge_copy = copy.deepcopy(self.knowledge)
         
         for one in knowledge_copy:
@@ -230,6 +296,39 @@ class MinesweeperAI():
                             count_new = two.count - one.count
                             self.knowledge.append(Sentence(cells_new, count_new))
 
+    def linear_inference(self):
+        """
+        Treats the knowledge base as a system of linear equations over
+        0/1 cell variables, reduces it with Gaussian elimination and marks
+        every cell forced to be safe or a mine, until no more can be found.
+        Unlike the subset rule, this combines any number of sentences.
+        """
+        while True:
+            # Sentences without cells carry no information.
+            self.knowledge = [
+                sentence for sentence in self.knowledge if sentence.cells
+            ]
+            constraints = set(
+                (frozenset(sentence.cells), sentence.count)
+                for sentence in self.knowledge
+            )
+
+            safes = set()
+            mines = set()
+            for cells, component in frontier_components(constraints):
+                component_safes, component_mines = reduce_constraints(
+                    cells, component
+                )
+                safes |= component_safes
+                mines |= component_mines
+
+            if not safes and not mines:
+                return
+            for cell in mines:
+                self.mark_mine(cell)
+            for cell in safes:
+                self.mark_safe(cell)
+
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -239,11 +338,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for move in self.safes:
-            if move not in self.moves_made:
-                return move
-        return None
-
+        return self.pending_safes.peek()
 
     def make_random_move(self):
         """
@@ -252,26 +347,319 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        # Make a list of all possible moves.
-        all_moves = []
-        for i in range(self.height):
-            for j in range(self.width):
-                all_moves.append((i, j))
-        
-        # Remove the moves that have already been made.
-        for move in self.moves_made:
-            if move in all_moves:
-                all_moves.remove(move)
-        
-        # Remove the moves that are known to be mines.
-        for move in self.mines:
-            if move in all_moves:
-                all_moves.remove(move)
-
-        # If no moves are possible, return None.
-        random.shuffle(all_moves)
-        if len(all_moves) > 0:
-            return all_moves[0]
-        else:
+        return self.unknown.choice()
+
+    def make_guess_move(self, time_limit=0.5):
+        """
+        Returns the move least likely to be a mine, chosen randomly among
+        equally risky cells. Cells already known to be safe are returned
+        first. Returns None if no moves are possible.
+        """
+        probabilities = self.mine_probabilities(time_limit)
+        if not probabilities:
             return None
-       
\ No newline at end of file
+
+        lowest = min(probabilities.values())
+        candidates = [
+            cell for cell, probability in probabilities.items()
+            if probability <= lowest + 1e-9
+        ]
+        return random.choice(candidates)
+
+    def mine_probabilities(self, time_limit=0.5):
+        """
+        Returns a dictionary mapping every cell that has not been chosen
+        and is not known to be a mine to the probability that it is a mine.
+
+        Cells mentioned by the knowledge base (the frontier) are split into
+        independent components, and every mine configuration consistent
+        with a component's sentences is enumerated. The remaining cells
+        (the interior) share the leftover mines, so each combination of
+        component configurations is weighted by the number of ways to place
+        those leftover mines in the interior.
+
+        Enumeration stops after `time_limit` seconds; components that were
+        not finished by then fall back to a local estimate.
+        """
+        deadline = time.perf_counter() + time_limit
+
+        unknown = set(self.unknown)
+        if not unknown:
+            return dict()
+        undecided = unknown - self.safes
+
+        # Collect the distinct constraints over undecided cells.
+        constraints = set()
+        for sentence in self.knowledge:
+            cells = frozenset(sentence.cells & undecided)
+            if cells:
+                count = sentence.count - len(sentence.cells & self.mines)
+                constraints.add((cells, count))
+
+        probabilities = {cell: 0 for cell in unknown - undecided}
+        frontier = set().union(*(cells for cells, _ in constraints))
+        interior = undecided - frontier
+        mines_left = self.total_mines - len(self.mines)
+
+        # Enumerate each component, falling back to an estimate on timeout.
+        exact = []
+        for cells, component in frontier_components(constraints):
+            try:
+                exact.append(
+                    (cells, enumerate_component(cells, component, deadline))
+                )
+            except (TimeoutError, RecursionError):
+                estimate = estimate_component(cells, component)
+                probabilities.update(estimate)
+                mines_left -= round(sum(estimate.values()))
+
+        # Weight the component configurations by the interior placements.
+        def weight(frontier_mines):
+            rest = mines_left - frontier_mines
+            if 0 <= rest <= len(interior):
+                return math.comb(len(interior), rest)
+            return 0
+
+        totals = [solutions for _, (solutions, _) in exact]
+        combined = convolve_all(totals)
+        total_weight = sum(
+            ways * weight(mines) for mines, ways in combined.items()
+        )
+
+        # The knowledge base disagrees with the mine count (for example, if
+        # the AI was told the wrong total), so treat components separately.
+        if total_weight == 0:
+            for cells, (solutions, cell_counts) in exact:
+                ways = sum(solutions.values())
+                for k, cell in enumerate(cells):
+                    probabilities[cell] = sum(
+                        counts[k] for counts in cell_counts.values()
+                    ) / ways
+            if interior:
+                expected = sum(
+                    probabilities[cell] for cell in frontier
+                    if cell in probabilities
+                )
+                share = (mines_left - expected) / len(interior)
+                for cell in interior:
+                    probabilities[cell] = min(max(share, 0), 1)
+            return probabilities
+
+        for index, (cells, (solutions, cell_counts)) in enumerate(exact):
+            others = convolve_all(totals[:index] + totals[index + 1:])
+            for k, cell in enumerate(cells):
+                mine_weight = 0
+                for mines, counts in cell_counts.items():
+                    if counts[k]:
+                        mine_weight += counts[k] * sum(
+                            ways * weight(mines + other)
+                            for other, ways in others.items()
+                        )
+                probabilities[cell] = mine_weight / total_weight
+
+        if interior:
+            interior_mines = sum(
+                ways * weight(mines) * (mines_left - mines)
+                for mines, ways in combined.items()
+            )
+            share = interior_mines / total_weight / len(interior)
+            for cell in interior:
+                probabilities[cell] = share
+
+        return probabilities
+
+
+def neighbor_table(height, width):
+    """
+    Returns a dictionary mapping each cell of a `height` by `width` board
+    to a tuple of the cells within one row and column of it, not including
+    the cell itself.
+    """
+    table = dict()
+    for i in range(height):
+        for j in range(width):
+            table[(i, j)] = tuple(
+                (i + di, j + dj)
+                for di in (-1, 0, 1)
+                for dj in (-1, 0, 1)
+                if (di, dj) != (0, 0)
+                and 0 <= i + di < height and 0 <= j + dj < width
+            )
+    return table
+
+
+def frontier_components(constraints):
+    """
+    Splits `constraints`, a set of `(cells, count)` pairs, into groups
+    that share no cells. Returns a list of `(cells, constraints)` pairs,
+    where `cells` is ordered so that neighboring cells are adjacent.
+    """
+    by_cell = dict()
+    for constraint in constraints:
+        for cell in constraint[0]:
+            by_cell.setdefault(cell, []).append(constraint)
+
+    components = []
+    visited = set()
+    for start in sorted(by_cell):
+        if start in visited:
+            continue
+        cells = []
+        component = set()
+        queue = [start]
+        visited.add(start)
+        while queue:
+            cell = queue.pop(0)
+            cells.append(cell)
+            for constraint in by_cell[cell]:
+                if constraint in component:
+                    continue
+                component.add(constraint)
+                for other in sorted(constraint[0]):
+                    if other not in visited:
+                        visited.add(other)
+                        queue.append(other)
+        components.append((cells, list(component)))
+
+    return components
+
+
+def enumerate_component(cells, constraints, deadline):
+    """
+    Enumerates every assignment of mines to `cells` that satisfies all
+    `(cells, count)` constraints. Returns a pair of dictionaries keyed by
+    the number of mines in the assignment: the number of assignments, and
+    for each cell, the number of those assignments in which it is a mine.
+
+    Raises TimeoutError if `deadline` (a `time.perf_counter` value) passes.
+    """
+    index = {cell: k for k, cell in enumerate(cells)}
+    involved = [[] for _ in cells]
+    needed = []
+    free = []
+    for c, (constraint_cells, count) in enumerate(constraints):
+        needed.append(count)
+        free.append(len(constraint_cells))
+        for cell in constraint_cells:
+            involved[index[cell]].append(c)
+
+    solutions = dict()
+    cell_counts = dict()
+    assignment = [0] * len(cells)
+
+    def backtrack(k, mines):
+        if time.perf_counter() > deadline:
+            raise TimeoutError
+        if k == len(cells):
+            solutions[mines] = solutions.get(mines, 0) + 1
+            counts = cell_counts.setdefault(mines, [0] * len(cells))
+            for i, value in enumerate(assignment):
+                counts[i] += value
+            return
+
+        for value in (0, 1):
+            for c in involved[k]:
+                free[c] -= 1
+                needed[c] -= value
+            if all(0 <= needed[c] <= free[c] for c in involved[k]):
+                assignment[k] = value
+                backtrack(k + 1, mines + value)
+            for c in involved[k]:
+                free[c] += 1
+                needed[c] += value
+        assignment[k] = 0
+
+    backtrack(0, 0)
+    return solutions, cell_counts
+
+
+def reduce_constraints(cells, constraints):
+    """
+    Row-reduces the `(cells, count)` constraints over `cells` using
+    fraction-free Gaussian elimination. A reduced row is forced when its
+    right-hand side equals the smallest or largest value its left-hand side
+    can take with 0/1 variables. Returns the sets of cells forced to be
+    safe and forced to be mines.
+    """
+    column = {cell: k for k, cell in enumerate(cells)}
+    n = len(cells)
+    rows = []
+    for constraint_cells, count in constraints:
+        row = [0] * (n + 1)
+        for cell in constraint_cells:
+            row[column[cell]] = 1
+        row[n] = count
+        rows.append(row)
+
+    # Reduce to row echelon form, eliminating each pivot from all other rows.
+    pivot_row = 0
+    for col in range(n):
+        pivot = None
+        for r in range(pivot_row, len(rows)):
+            if rows[r][col]:
+                pivot = r
+                break
+        if pivot is None:
+            continue
+        rows[pivot_row], rows[pivot] = rows[pivot], rows[pivot_row]
+        p = rows[pivot_row]
+        for r in range(len(rows)):
+            a = rows[r][col]
+            if r == pivot_row or not a:
+                continue
+            row = [p[col] * x - a * y for x, y in zip(rows[r], p)]
+            divisor = math.gcd(*row)
+            if divisor > 1:
+                row = [x // divisor for x in row]
+            rows[r] = row
+        pivot_row += 1
+
+    safes = set()
+    mines = set()
+    for row in rows:
+        lowest = sum(x for x in row[:n] if x < 0)
+        highest = sum(x for x in row[:n] if x > 0)
+        if row[n] == lowest:
+            positive, negative = safes, mines
+        elif row[n] == highest:
+            positive, negative = mines, safes
+        else:
+            continue
+        for k in range(n):
+            if row[k] > 0:
+                positive.add(cells[k])
+            elif row[k] < 0:
+                negative.add(cells[k])
+
+    return safes, mines
+
+
+def estimate_component(cells, constraints):
+    """
+    Estimates the probability that each cell in `cells` is a mine as the
+    average mine density of the constraints that mention it.
+    """
+    densities = {cell: [] for cell in cells}
+    for constraint_cells, count in constraints:
+        for cell in constraint_cells:
+            densities[cell].append(count / len(constraint_cells))
+    return {
+        cell: sum(values) / len(values)
+        for cell, values in densities.items()
+    }
+
+
+def convolve_all(distributions):
+    """
+    Given dictionaries mapping a number of mines to a number of ways,
+    returns the distribution of the total number of mines.
+    """
+    combined = {0: 1}
+    for distribution in distributions:
+        result = dict()
+        for mines, ways in combined.items():
+            for other, other_ways in distribution.items():
+                total = mines + other
+                result[total] = result.get(total, 0) + ways * other_ways
+        combined = result
+    return combined
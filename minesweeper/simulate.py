@@ -0,0 +1,184 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+HEIGHT = 8
+WIDTH = 8
+MINES = 8
+
+# Number of games handed to a worker at a time
+CHUNK_SIZE = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games headlessly and report statistics."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=HEIGHT)
+    parser.add_argument("--width", type=int, default=WIDTH)
+    parser.add_argument("--mines", type=int, default=MINES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument(
+        "--guess", choices=["random", "probable"], default="probable",
+        help="how the AI moves when no safe move is known"
+    )
+    parser.add_argument(
+        "--solver", choices=["subset", "linear"], default="subset",
+        help="inference rule used by the AI"
+    )
+    args = parser.parse_args()
+
+    if args.mines >= args.height * args.width:
+        sys.exit("There must be fewer mines than cells.")
+
+    results = simulate(
+        args.games, args.height, args.width, args.mines,
+        seed=args.seed, processes=args.processes, guess=args.guess,
+        solver=args.solver
+    )
+    print(json.dumps(results, indent=2))
+
+
+def simulate(games, height=HEIGHT, width=WIDTH, mines=MINES,
+             seed=0, processes=None, guess="probable", solver="subset"):
+    """
+    Play `games` games of Minesweeper across a pool of worker processes.
+    Game `k` is seeded with `seed + k`, so results are reproducible
+    regardless of the number of processes.
+
+    Return a dictionary with the win rate, the number of safe moves the AI
+    deduced and guesses it made, throughput and per-move latency
+    percentiles (in milliseconds) of the AI.
+    """
+    # Keep chunks small enough that every worker gets a share of the games
+    workers = processes or multiprocessing.cpu_count()
+    size = max(1, min(CHUNK_SIZE, -(-games // (workers * 4))))
+    chunks = [
+        (start, min(size, games - start), height, width, mines, seed, guess,
+         solver)
+        for start in range(0, games, size)
+    ]
+
+    totals = collections.Counter()
+    latencies = collections.Counter()
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(play_chunk, chunks):
+            latencies.update(result.pop("latencies"))
+            totals.update(result)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "seed": seed,
+        "guess": guess,
+        "solver": solver,
+        "wins": totals["wins"],
+        "win_rate": totals["wins"] / games if games else 0,
+        "moves": totals["moves"],
+        "safe_moves": totals["safe_moves"],
+        "guesses": totals["guesses"],
+        "elapsed": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0,
+        "moves_per_sec": (
+            totals["moves"] / totals["time"] if totals["time"] else 0
+        ),
+        "latency_ms": {
+            name: percentile(latencies, fraction) / 1000
+            for name, fraction in [
+                ("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1)
+            ]
+        }
+    }
+
+
+def play_chunk(chunk):
+    """
+    Play a contiguous range of seeded games and return their combined
+    statistics. Latencies are counted in whole microseconds so that
+    chunks can be merged without keeping every sample.
+    """
+    start, count, height, width, mines, seed, guess, solver = chunk
+    result = collections.Counter()
+    latencies = collections.Counter()
+    for k in range(start, start + count):
+        random.seed(seed + k)
+        game = play_game(height, width, mines, guess, solver)
+        result["wins"] += game["won"]
+        result["moves"] += len(game["latencies"])
+        result["safe_moves"] += game["safe_moves"]
+        result["guesses"] += game["guesses"]
+        result["time"] += sum(game["latencies"])
+        latencies.update(int(latency * 1e6) for latency in game["latencies"])
+    result = dict(result)
+    result["latencies"] = latencies
+    return result
+
+
+def play_game(height, width, mines, guess="probable", solver="subset"):
+    """
+    Let the AI play one game to completion, in the same way as `runner.py`
+    does when the "AI Move" button is pressed repeatedly.
+
+    Return a dictionary with whether the AI won, how many of its moves
+    were known to be safe and how many were guesses, along with the time
+    in seconds the AI took to choose and learn from each move.
+    """
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines, solver=solver)
+    safe_cells = height * width - mines
+    result = {"won": False, "safe_moves": 0, "guesses": 0, "latencies": []}
+
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is not None:
+            result["safe_moves"] += 1
+        else:
+            result["guesses"] += 1
+            if guess == "probable":
+                move = ai.make_guess_move()
+            else:
+                move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            result["latencies"].append(time.perf_counter() - start)
+            return result
+
+        ai.add_knowledge(move, game.nearby_mines(move))
+        result["latencies"].append(time.perf_counter() - start)
+
+        if len(ai.moves_made) == safe_cells:
+            result["won"] = True
+            return result
+
+
+def percentile(counts, fraction):
+    """
+    Return the smallest value in the `counts` histogram such that at least
+    `fraction` of all samples are less than or equal to it.
+    """
+    total = sum(counts.values())
+    if total == 0:
+        return 0
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= fraction * total:
+            return value
+    return value
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import time
+
+import numpy as np
+
+from nim import ArrayQTable, NimAI
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train a NimAI with many games played at once."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000000)
+    parser.add_argument("--initial", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ai = train_batch(args.games, args.initial, batch_size=args.batch_size,
+                     seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Played {args.games} training games in {elapsed:.2f} seconds "
+          f"({args.games / elapsed:.0f} games/sec)")
+    print(f"Best opening move: {ai.choose_action(args.initial, epsilon=False)}")
+
+
+class BatchNim():
+
+    def __init__(self, table, size):
+        """
+        Initialize `size` games of Nim played at once, starting from the
+        piles of the `ArrayQTable` `table`. States and actions are rows and
+        columns of `table`.
+
+        Each game has
+            - `piles`: a row of how many elements remain in each pile
+            - `player`: 0 or 1 to indicate which player's turn
+            - `last_state`, `last_action`: the last state and action of
+              each player, or -1 if that player has not moved yet
+        """
+        self.table = table
+        self.initial = np.array(table.initial, dtype=np.int64)
+        self.strides = np.array(table.strides, dtype=np.int64)
+        self.piles = np.tile(self.initial, (size, 1))
+        self.player = np.zeros(size, dtype=np.int64)
+        self.last_state = np.full((2, size), -1, dtype=np.int64)
+        self.last_action = np.full((2, size), -1, dtype=np.int64)
+
+    def states(self):
+        """
+        Return the state index of every game.
+        """
+        return self.piles @ self.strides
+
+    def move(self, actions):
+        """
+        Make the move `actions[k]` (a column of the table) in game `k`
+        for its current player, then switch players. Return the state of
+        every game after the move; a state of 0 means the player who moved
+        took the last object and lost.
+        """
+        rows = np.arange(len(actions))
+        self.piles[rows, self.table.action_piles[actions]] -= (
+            self.table.action_counts[actions]
+        )
+        self.player = 1 - self.player
+        return self.states()
+
+    def reset(self, games):
+        """
+        Start the games selected by the index or mask `games` over.
+        """
+        self.piles[games] = self.initial
+        self.player[games] = 0
+        self.last_state[:, games] = -1
+        self.last_action[:, games] = -1
+
+
+def train_batch(n, initial=[1, 3, 5, 7], ai=None, batch_size=4096, seed=0):
+    """
+    Train an AI by playing `n` games against itself, `batch_size` games
+    at a time, using the same rewards as `nim.train`.
+
+    Actions are chosen epsilon-greedily for all games with array
+    operations on the AI's `ArrayQTable`, and all Q-values updated by a
+    step are changed together.
+
+    Return `ai`, or a new AI with an `ArrayQTable` if `ai` is None.
+    The table must not be canonical, since games index it directly by
+    their piles.
+    """
+    if ai is None:
+        ai = NimAI(q=ArrayQTable(initial))
+    table = ai.q
+    if table.canonical:
+        raise ValueError("Batch training needs a table that is not canonical")
+    values = table.values
+    rng = np.random.default_rng(seed)
+
+    size = min(batch_size, n)
+    env = BatchNim(table, size)
+    columns = np.arange(size)
+    started = size
+    finished = 0
+    active = np.ones(size, dtype=bool)
+
+    while finished < n:
+        states = env.states()
+        legal = table.legal_masks[states]
+
+        # Choose greedy actions, or random available actions with
+        # probability epsilon.
+        greedy = np.where(legal, values[states], -np.inf).argmax(axis=1)
+        explore = np.where(legal, rng.random(legal.shape), -1).argmax(axis=1)
+        actions = np.where(rng.random(size) < ai.epsilon, explore, greedy)
+
+        player = env.player.copy()
+        env.last_state[player, columns] = states
+        env.last_action[player, columns] = actions
+        new_states = env.move(actions)
+        over = new_states == 0
+
+        # The opponent of the player who moved, if it has moved before,
+        # gets a reward of 1 if the game is over and 0 otherwise.
+        opponent_state = env.last_state[1 - player, columns]
+        opponent_action = env.last_action[1 - player, columns]
+        future = np.where(
+            table.legal_masks[new_states], values[new_states], -np.inf
+        ).max(axis=1)
+        future[over] = 0
+        waiting = active & (opponent_state >= 0)
+
+        update_states = np.concatenate(
+            [states[active & over], opponent_state[waiting]]
+        )
+        update_actions = np.concatenate(
+            [actions[active & over], opponent_action[waiting]]
+        )
+        targets = np.concatenate([
+            np.full(np.count_nonzero(active & over), -1.0),
+            np.where(over, 1.0, 0.0)[waiting] + future[waiting]
+        ])
+        update(values, update_states, update_actions, targets, ai.alpha)
+
+        # Start new games in place of the finished ones. Once `n` games
+        # have been started, games that finish keep playing but no longer
+        # update the table.
+        done = np.flatnonzero(active & over)
+        finished += len(done)
+        more = max(0, min(len(done), n - started))
+        active[done[more:]] = False
+        started += more
+        env.reset(over)
+
+    return ai
+
+
+def update(values, states, actions, targets, alpha):
+    """
+    Move each Q-value `values[states[k], actions[k]]` towards `targets[k]`
+    by a fraction `alpha`. When several targets are given for the same
+    pair, the pair moves towards their average, so that a batch of
+    identical games changes a Q-value as much as a single game would.
+    """
+    if len(states) == 0:
+        return
+    pairs, inverse = np.unique(
+        states * values.shape[1] + actions, return_inverse=True
+    )
+    totals = np.bincount(inverse, weights=targets, minlength=len(pairs))
+    counts = np.bincount(inverse, minlength=len(pairs))
+    rows, columns = np.divmod(pairs, values.shape[1])
+    values[rows, columns] += alpha * (totals / counts - values[rows, columns])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import functools
+import itertools
+import json
+import random
+
+import numpy as np
+
+from nim import ArrayQTable, DictQTable, NimAI, ReplayBuffer, train
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train a NimAI and track how often it plays optimally."
+    )
+    parser.add_argument("-n", "--games", type=int, default=20000)
+    parser.add_argument("--initial", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--every", type=int, default=500,
+                        help="evaluate the AI every EVERY games")
+    parser.add_argument("--target", type=float, default=None,
+                        help="stop once this fraction of states is optimal")
+    parser.add_argument("--table", choices=["dict", "array"], default="array")
+    parser.add_argument("--canonical", action="store_true",
+                        help="share Q-values between permutations of a state")
+    parser.add_argument("--replay", type=int, default=0,
+                        help="capacity of the replay buffer (0 for none)")
+    parser.add_argument("--replay-batch", type=int, default=32)
+    parser.add_argument("--trace-decay", type=float, default=0,
+                        help="lambda for lambda-returns (0 for one-step)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    evaluator = Evaluator(args.initial)
+    if args.table == "array":
+        q = ArrayQTable(args.initial, canonical=args.canonical)
+    else:
+        q = DictQTable(canonical=args.canonical, initial=args.initial)
+    player = NimAI(
+        q=q,
+        replay=ReplayBuffer(args.replay) if args.replay else None,
+        replay_batch=args.replay_batch,
+        trace_decay=args.trace_decay
+    )
+    curve = []
+
+    def record(games, player):
+        score = evaluator.evaluate(player)
+        curve.append({"games": games, "optimal": score})
+        return args.target is not None and score >= args.target
+
+    train(args.games, initial=args.initial, verbose=False,
+          callback=record, callback_every=args.every, player=player)
+    print(json.dumps({
+        "initial": args.initial,
+        "winning_states": len(evaluator.states),
+        "table_states": q.states if args.table == "array" else None,
+        "games_to_target": converged(curve, args.target),
+        "curve": curve
+    }, indent=2))
+
+
+def optimal_moves(piles):
+    """
+    Return the set of moves `(i, j)` that win Nim from `piles` with
+    perfect play, or an empty set if every move loses.
+
+    In this game the player who takes the last object loses (misère Nim).
+    Optimal play follows the usual nim-sum strategy of moving to a
+    position whose piles XOR to 0, except when that would leave only piles
+    of size 0 or 1: then the winning move leaves an odd number of 1s.
+    """
+    large = [i for i, pile in enumerate(piles) if pile > 1]
+    ones = sum(1 for pile in piles if pile == 1)
+
+    # Only piles of size 1 remain: win by leaving an odd number of them.
+    if not large:
+        if ones % 2 == 1:
+            return set()
+        return set((i, 1) for i, pile in enumerate(piles) if pile == 1)
+
+    # One large pile: reduce it to 0 or 1 to leave an odd number of 1s.
+    if len(large) == 1:
+        i = large[0]
+        keep = 1 if ones % 2 == 0 else 0
+        return {(i, piles[i] - keep)}
+
+    nim_sum = functools.reduce(lambda a, b: a ^ b, piles)
+    return set(
+        (i, pile - (pile ^ nim_sum))
+        for i, pile in enumerate(piles)
+        if pile ^ nim_sum < pile
+    )
+
+
+class Evaluator():
+
+    def __init__(self, initial=[1, 3, 5, 7]):
+        """
+        Precompute the optimal moves of every state reachable from the
+        piles `initial` that can be won. In the remaining states every
+        move loses against perfect play, so they are not evaluated.
+        """
+        self.initial = list(initial)
+        self.states = []
+        self.moves = []
+        for state in itertools.product(*(range(pile + 1) for pile in initial)):
+            moves = optimal_moves(state)
+            if moves:
+                self.states.append(state)
+                self.moves.append(moves)
+        self.masks = dict()
+
+    def evaluate(self, ai):
+        """
+        Return the fraction of winnable states in which
+        `ai.choose_action(state, epsilon=False)` is an optimal move.
+        """
+        if not self.states:
+            return 1
+        if isinstance(ai.q, ArrayQTable) and not ai.q.canonical:
+            return self.evaluate_array(ai.q)
+        optimal = sum(
+            ai.choose_action(state, epsilon=False) in moves
+            for state, moves in zip(self.states, self.moves)
+        )
+        return optimal / len(self.states)
+
+    def evaluate_array(self, table):
+        """
+        Evaluate the greedy actions of an `ArrayQTable` for all states at
+        once. Ties are broken as `ArrayQTable.best_action` breaks them.
+        """
+        rows, optimal = self.masks.get(tuple(table.initial), (None, None))
+        if rows is None:
+            rows = np.array([table.state_index(state) for state in self.states])
+            optimal = np.zeros((len(rows), table.values.shape[1]), dtype=bool)
+            for k, moves in enumerate(self.moves):
+                for action in moves:
+                    optimal[k, table.action_index(action)] = True
+            self.masks[tuple(table.initial)] = (rows, optimal)
+
+        greedy = np.where(
+            table.legal_masks[rows], table.values[rows], -np.inf
+        ).argmax(axis=1)
+        return float(optimal[np.arange(len(rows)), greedy].mean())
+
+
+def converged(curve, target):
+    """
+    Return the number of games after which the AI first reached `target`
+    in the convergence `curve`, or None if it never did.
+    """
+    if target is None:
+        return None
+    for point in curve:
+        if point["optimal"] >= target:
+            return point["games"]
+    return None
+
+
+if __name__ == "__main__":
+    main()
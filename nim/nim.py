@@ -1,7 +1,25 @@
+import bisect
+import json
 import math
 import random
+import struct
 import time
 
+import numpy as np
+
+# Cache of the actions available in each state, used by Nim.action_list
+ACTION_LISTS = dict()
+
+# Caches of the sorted form of each state and of the actions of each sorted
+# state, used by canonical_state and canonical_actions
+CANONICAL_STATES = dict()
+CANONICAL_ACTIONS = dict()
+
+# Q-table files start with this magic string and the length of a JSON
+# header; the values follow, aligned to QTABLE_ALIGNMENT bytes.
+QTABLE_MAGIC = b"NIMQTBL1"
+QTABLE_ALIGNMENT = 64
+
 
 class Nim():
 
@@ -32,6 +50,22 @@ class Nim():
                 actions.add((i, j))
         return actions
 
+    @classmethod
+    def action_list(cls, piles):
+        """
+        Nim.action_list(piles) returns the same actions as
+        Nim.available_actions(piles), as a tuple in `(i, j)` order.
+
+        The tuple is computed once per state and cached, so repeatedly
+        visiting a state during training does not rebuild its actions.
+        """
+        state = tuple(piles)
+        actions = ACTION_LISTS.get(state)
+        if actions is None:
+            actions = tuple(sorted(cls.available_actions(state)))
+            ACTION_LISTS[state] = actions
+        return actions
+
     @classmethod
     def other_player(cls, player):
         """
@@ -70,21 +104,401 @@ class Nim():
             self.winner = self.player
 
 
+class DictQTable(dict):
+
+    def __init__(self, canonical=False, initial=[1, 3, 5, 7]):
+        """
+        Q-learning dictionary that maps `(state, action)` pairs
+        to a Q-value (a number), for games starting from the piles
+        `initial`.
+         - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
+         - `action` is a tuple `(i, j)` for an action
+
+        Pairs that are not in the dictionary have a Q-value of 0.
+
+        If `canonical` is True, states that are permutations of each other
+        share their Q-values: pairs are stored under the sorted state, with
+        actions renumbered to match (see `canonical_key`), and actions are
+        returned with the indices of the piles in the state given.
+        """
+        super().__init__()
+        self.canonical = canonical
+        self.initial = list(initial)
+
+    def key(self, state, action):
+        """
+        Return the dictionary key of `state` and `action`.
+        """
+        if self.canonical:
+            return canonical_key(state, action)
+        return (tuple(state), action)
+
+    def get_value(self, state, action):
+        """
+        Return the Q-value for `state` and `action`, or 0 if it is unknown.
+        """
+        return self.get(self.key(state, action), 0)
+
+    def set_value(self, state, action, value):
+        """
+        Set the Q-value for `state` and `action` to `value`.
+        """
+        self[self.key(state, action)] = value
+
+    def best_value(self, state):
+        """
+        Return the highest Q-value of any action available in `state`,
+        or 0 if there are no available actions.
+        """
+        if self.canonical:
+            state, _ = canonical_state(state)
+            actions = canonical_actions(state)
+        else:
+            state = tuple(state)
+            actions = Nim.action_list(state)
+        best = None
+        for action in actions:
+            value = self.get((state, action), 0)
+            if best is None or value > best:
+                best = value
+        return 0 if best is None else best
+
+    def best_action(self, state):
+        """
+        Return the action available in `state` with the highest Q-value,
+        preferring the first in `(i, j)` order among ties.
+        """
+        if self.canonical:
+            state, order = canonical_state(state)
+            actions = canonical_actions(state)
+        else:
+            state = tuple(state)
+            actions = Nim.action_list(state)
+        best = None
+        best_value = None
+        for action in actions:
+            value = self.get((state, action), 0)
+            if best is None or value > best_value:
+                best = action
+                best_value = value
+        if self.canonical and best is not None:
+            return (order[best[0]], best[1])
+        return best
+
+
+class ArrayQTable():
+
+    def __init__(self, initial=[1, 3, 5, 7], dtype=np.float64, values=None,
+                 canonical=False):
+        """
+        Q-learning table for games starting from the piles `initial`,
+        stored as a dense NumPy array with a row for every state and a
+        column for every action.
+
+        A state (a list of pile sizes, each at most its initial size) is
+        encoded as a mixed-radix number whose digits are the pile sizes,
+        and action `(i, j)` is column `j - 1` past the columns of the piles
+        before pile `i`. Unvisited pairs have a Q-value of 0.
+
+        If `canonical` is True, states that are permutations of each other
+        share a row, as in a canonical `DictQTable`. The piles are laid out
+        in sorted order, and only states whose piles are in sorted order
+        get a row, found through the `rows` lookup of mixed-radix numbers.
+
+        `values` may be an existing array of the right shape, such as a
+        memory-mapped file, to use instead of a new array of zeros.
+        """
+        self.initial = list(initial)
+        self.canonical = canonical
+        if canonical:
+            initial = sorted(initial)
+        self.limits = list(initial)
+
+        # Place value of each pile in the state index
+        self.strides = [1] * len(initial)
+        for k in range(len(initial) - 2, -1, -1):
+            self.strides[k] = self.strides[k + 1] * (initial[k + 1] + 1)
+        numbers = self.strides[0] * (initial[0] + 1) if initial else 1
+
+        # Pile sizes of every state
+        indices = np.arange(numbers)
+        self.piles = np.stack(
+            [(indices // stride) % (pile + 1)
+             for stride, pile in zip(self.strides, initial)], axis=1
+        ).reshape(numbers, len(initial))
+        self.rows = None
+        if canonical:
+            keep = np.all(self.piles[:, 1:] >= self.piles[:, :-1], axis=1)
+            self.piles = self.piles[keep]
+            self.rows = np.full(numbers, -1, dtype=np.int64)
+            self.rows[keep] = np.arange(len(self.piles))
+        self.states = len(self.piles)
+
+        # Column of the first action of each pile, and each column's action
+        self.offsets = [0] * len(initial)
+        for k in range(1, len(initial)):
+            self.offsets[k] = self.offsets[k - 1] + initial[k - 1]
+        self.action_piles = np.repeat(np.arange(len(initial)), initial)
+        self.action_counts = np.concatenate(
+            [np.arange(1, pile + 1) for pile in initial] or [[]]
+        ).astype(np.int64)
+
+        shape = (self.states, sum(initial))
+        if values is None:
+            values = np.zeros(shape, dtype=dtype)
+        elif values.shape != shape:
+            raise ValueError(f"Expected values of shape {shape}")
+        self.values = values
+
+        # Which actions each state allows. A canonical table only uses the
+        # actions on the first of several equal piles.
+        self.legal_masks = (
+            self.action_counts[np.newaxis, :] <= self.piles[:, self.action_piles]
+        )
+        if canonical:
+            first = np.ones(self.piles.shape, dtype=bool)
+            first[:, 1:] = self.piles[:, 1:] != self.piles[:, :-1]
+            self.legal_masks &= first[:, self.action_piles]
+
+    @classmethod
+    def from_dict(cls, q, initial=None, dtype=np.float64):
+        """
+        Return an `ArrayQTable` with the Q-values of the `DictQTable` `q`,
+        for games starting from the piles `initial`, or from those of `q`
+        if `initial` is not given. Raise ValueError if a state or action
+        in `q` does not fit those piles.
+        """
+        if initial is None:
+            initial = q.initial
+        table = cls(initial, dtype=dtype, canonical=q.canonical)
+        for (state, action), value in q.items():
+            i, j = action
+            if not 0 <= i < len(state) or not 1 <= j <= state[i]:
+                raise ValueError(f"Action {action} is not available in "
+                                 f"state {state}")
+            table.set_value(state, action, value)
+        return table
+
+    def to_dict(self):
+        """
+        Return a `DictQTable` with every nonzero Q-value of this table.
+        """
+        q = DictQTable(canonical=self.canonical, initial=self.initial)
+        for index, column in zip(*np.nonzero(self.values)):
+            state = tuple(int(pile) for pile in self.piles[index])
+            action = (int(self.action_piles[column]),
+                      int(self.action_counts[column]))
+            q[(state, action)] = self.values.item(index, column)
+        return q
+
+    def state_index(self, state):
+        """
+        Return the row of `state`. Raise ValueError if `state` does not
+        have a pile for each initial pile, or a pile exceeds its initial
+        size.
+        """
+        if self.canonical:
+            state, _ = canonical_state(state)
+        if len(state) != len(self.limits):
+            raise ValueError(f"State {tuple(state)} does not have "
+                             f"{len(self.limits)} piles")
+        index = 0
+        for pile, stride, limit in zip(state, self.strides, self.limits):
+            if not 0 <= pile <= limit:
+                raise ValueError(f"State {tuple(state)} does not fit "
+                                 f"the initial piles {self.initial}")
+            index += pile * stride
+        if self.canonical:
+            return self.rows.item(index)
+        return index
+
+    def locate(self, state, action):
+        """
+        Return the row and column of `state` and `action`.
+        """
+        if self.canonical:
+            state, action = canonical_key(state, action)
+        return self.state_index(state), self.action_index(action)
+
+    def action_index(self, action):
+        """
+        Return the column of `action`.
+        """
+        i, j = action
+        return self.offsets[i] + j - 1
+
+    def legal(self, state):
+        """
+        Return a boolean mask of the columns that are available actions
+        in `state`.
+        """
+        return self.legal_masks[self.state_index(state)]
+
+    def get_value(self, state, action):
+        """
+        Return the Q-value for `state` and `action`.
+        """
+        return self.values.item(*self.locate(state, action))
+
+    def set_value(self, state, action, value):
+        """
+        Set the Q-value for `state` and `action` to `value`.
+        """
+        self.values[self.locate(state, action)] = value
+
+    def best_value(self, state):
+        """
+        Return the highest Q-value of any action available in `state`,
+        or 0 if there are no available actions.
+        """
+        # Only the state with every pile empty, row 0, has no actions.
+        index = self.state_index(state)
+        if index == 0:
+            return 0
+        return self.values[index][self.legal_masks[index]].max().item()
+
+    def best_action(self, state):
+        """
+        Return the action available in `state` with the highest Q-value,
+        preferring the first in `(i, j)` order among ties.
+        """
+        index = self.state_index(state)
+        row = np.where(self.legal_masks[index], self.values[index], -np.inf)
+        column = int(row.argmax())
+        i = int(self.action_piles[column])
+        if self.canonical:
+            i = canonical_state(state)[1][i]
+        return (i, int(self.action_counts[column]))
+
+
+class ReplayBuffer():
+
+    def __init__(self, capacity=10000):
+        """
+        Fixed-size ring buffer of `(old_state, action, new_state, reward)`
+        transitions. Once `capacity` transitions have been added, each new
+        transition overwrites the oldest one.
+        """
+        self.capacity = capacity
+        self.transitions = [None] * capacity
+        self.size = 0
+        self.next = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, transition):
+        """
+        Add `transition` to the buffer.
+        """
+        self.transitions[self.next] = transition
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, k):
+        """
+        Return up to `k` distinct transitions chosen at random.
+        """
+        indices = random.sample(range(self.size), min(k, self.size))
+        return [self.transitions[i] for i in indices]
+
+
 class NimAI():
 
-    def __init__(self, alpha=0.5, epsilon=0.1):
+    def __init__(self, alpha=0.5, epsilon=0.1, q=None,
+                 replay=None, replay_batch=32, trace_decay=0):
         """
-        Initialize AI with an empty Q-learning dictionary,
+        Initialize AI with an empty Q-learning table,
         an alpha (learning) rate, and an epsilon rate.
 
-        The Q-learning dictionary maps `(state, action)`
+        The Q-learning table maps `(state, action)`
         pairs to a Q-value (a number).
          - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
          - `action` is a tuple `(i, j)` for an action
+
+        By default the table is a `DictQTable`; pass an `ArrayQTable`
+        as `q` to store Q-values in a NumPy array instead.
+
+        If `replay` is a `ReplayBuffer`, every update is stored in it and
+        `replay_batch` stored updates are repeated after each training
+        game. If `trace_decay` (lambda) is above 0, training games update
+        all of a player's moves at the end of the game towards their
+        lambda-returns, so rewards reach early moves in a single game.
         """
-        self.q = dict()
+        self.q = DictQTable() if q is None else q
         self.alpha = alpha
         self.epsilon = epsilon
+        self.replay = replay
+        self.replay_batch = replay_batch
+        self.trace_decay = trace_decay
+
+    def save(self, filename):
+        """
+        Save the Q-learning table to `filename` as a binary file:
+        a JSON header with the pile configuration, the hyperparameters
+        and the table layout, followed by the raw array of Q-values.
+
+        A `DictQTable` is converted to an array first, and
+        is converted back when the file is loaded.
+        """
+        if isinstance(self.q, ArrayQTable):
+            table = self.q
+        else:
+            table = ArrayQTable.from_dict(self.q)
+        values = np.ascontiguousarray(table.values)
+
+        header = json.dumps({
+            "initial": table.initial,
+            "table": type(self.q).__name__,
+            "canonical": table.canonical,
+            "dtype": values.dtype.str,
+            "shape": list(values.shape),
+            "alpha": self.alpha,
+            "epsilon": self.epsilon
+        }).encode()
+
+        # Pad the header so that the values start on an aligned offset.
+        prefix = len(QTABLE_MAGIC) + 4
+        size = -(-(prefix + len(header)) // QTABLE_ALIGNMENT) * QTABLE_ALIGNMENT
+        header += b" " * (size - prefix - len(header))
+
+        with open(filename, "wb") as f:
+            f.write(QTABLE_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(values.tobytes())
+
+    @classmethod
+    def load(cls, filename, mmap=False):
+        """
+        Load an AI saved with `NimAI.save` from `filename`.
+
+        If `mmap` is True and the table was saved from an `ArrayQTable`,
+        the Q-values are memory-mapped from the file rather than read into
+        memory. Updates to a memory-mapped table are not written back.
+        """
+        with open(filename, "rb") as f:
+            if f.read(len(QTABLE_MAGIC)) != QTABLE_MAGIC:
+                raise ValueError(f"{filename} is not a Nim Q-table file")
+            length, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+            offset = f.tell()
+
+        dtype = np.dtype(header["dtype"])
+        shape = tuple(header["shape"])
+        if mmap and header["table"] == "ArrayQTable":
+            values = np.memmap(filename, dtype=dtype, mode="c",
+                               offset=offset, shape=shape)
+        else:
+            count = shape[0] * shape[1]
+            values = np.fromfile(filename, dtype=dtype, count=count,
+                                 offset=offset).reshape(shape)
+
+        q = ArrayQTable(header["initial"], dtype=dtype, values=values,
+                        canonical=header.get("canonical", False))
+        if header["table"] == "DictQTable":
+            q = q.to_dict()
+        return cls(alpha=header["alpha"], epsilon=header["epsilon"], q=q)
 
     def update(self, old_state, action, new_state, reward):
         """
@@ -92,21 +506,62 @@ class NimAI():
         in that state, a new resulting state, and the reward received
         from taking that action.
         """
+        if self.replay is not None:
+            self.replay.add((old_state, action, new_state, reward))
+        self.learn(old_state, action, new_state, reward)
+
+    def learn(self, old_state, action, new_state, reward):
+        """
+        Apply the one-step Q-learning update for a transition,
+        without storing it for replay.
+        """
         old = self.get_q_value(old_state, action)
         best_future = self.best_future_reward(new_state)
         self.update_q_value(old_state, action, old, reward, best_future)
 
+    def update_game(self, transitions):
+        """
+        Update Q-values from one player's `(old_state, action, new_state,
+        reward)` transitions of a finished game, given in the order they
+        were made, where `new_state` is the next state that player faced.
+
+        Each move is updated towards its lambda-return, which mixes the
+        one-step estimate with the return of the player's next move:
+
+        G(t) = reward(t) + (1 - lambda) * max Q(new_state(t))
+                         + lambda * G(t + 1)
+
+        Computing these returns backwards at the end of the game is the
+        offline equivalent of accumulating eligibility traces.
+        """
+        following = None
+        for old_state, action, new_state, reward in reversed(transitions):
+            if self.replay is not None:
+                self.replay.add((old_state, action, new_state, reward))
+            future = self.best_future_reward(new_state)
+            if following is not None:
+                future = ((1 - self.trace_decay) * future
+                          + self.trace_decay * following)
+            old = self.get_q_value(old_state, action)
+            self.update_q_value(old_state, action, old, reward, future)
+            following = reward + future
+
+    def end_game(self):
+        """
+        Called after each training game. Repeats a batch of
+        stored updates if the AI has a replay buffer.
+        """
+        if self.replay is None:
+            return
+        for transition in self.replay.sample(self.replay_batch):
+            self.learn(*transition)
+
     def get_q_value(self, state, action):
         """
         Return the Q-value for the state `state` and the action `action`.
         If no Q-value exists yet in `self.q`, return 0.
         """
-        # Return the Q-value for this particular state and action if it
-        # exists.
-        if (tuple(state), action) in self.q:
-            return self.q[(tuple(state), action)]
-        else:
-            return 0
+        return self.q.get_value(state, action)
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
         """
@@ -124,8 +579,8 @@ class NimAI():
         is the sum of the current reward and estimated future rewards.
         """
         # Q-learning formula.
-        self.q[(tuple(state), action)] = (old_q + self.alpha * 
-                                         ((future_rewards + reward) - old_q))
+        self.q.set_value(state, action, old_q + self.alpha *
+                         ((future_rewards + reward) - old_q))
 
     def best_future_reward(self, state):
         """
@@ -137,16 +592,7 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
-        actions = Nim.available_actions(state)
-        best_reward = 0
-
-        # Update best_reward if there is a better action to take.
-        for action in actions:
-            if (tuple(state), action) in self.q:
-                if self.q[(tuple(state), action)] > best_reward:
-                    best_reward = self.q[(tuple(state), action)]
-
-        return best_reward
+        return self.q.best_value(state)
 
     def choose_action(self, state, epsilon=True):
         """
@@ -163,88 +609,201 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
-        actions = Nim.available_actions(state)
-
         if epsilon == True:
             if random.uniform(0.0, 1.0) <= self.epsilon:
-                return random.choice(tuple(actions))
+                return random.choice(Nim.action_list(state))
 
         # Epsilon == False and 1 - epsilon has the same outcome.
-        best_action = ()
-        best_action_reward = 0
+        return self.q.best_action(state)
 
-        # If an action has a better reward than the current best action,
-        # change the best action to that action.
-        for action in actions:
-            if (tuple(state), action) in self.q:
-                if self.q[(tuple(state), action)] > best_action_reward:
-                    best_action = action
 
-        if best_action == ():
-            best_action = next(iter(actions))
-
-        return best_action
-
-
-def train(n):
+def train(n, q=None, initial=[1, 3, 5, 7], alpha=None, epsilon=None,
+          verbose=True, report_every=None, callback=None, callback_every=1000,
+          player=None):
     """
     Train an AI by playing `n` games against itself.
+    `q` is the Q-learning table to train, a new `DictQTable` by default,
+    and every game starts from the piles `initial`. To train an existing
+    AI instead, such as one with a replay buffer, pass it as `player`.
+    The table must be for the same initial piles, unless it is an empty
+    `DictQTable`, which then takes on `initial`.
+
+    `alpha` and `epsilon` may be numbers, or functions of the game number
+    (such as those returned by `linear_schedule`) that are called before
+    each game; if they are not given, the player's own rates are kept.
+    If `verbose` is False, nothing is printed unless `report_every` is
+    set, in which case progress and throughput in games per second are
+    printed every `report_every` games. Throughput is also stored in the
+    returned AI's `games_per_sec`.
+
+    If `callback` is given, it is called as `callback(games, player)`
+    every `callback_every` games, for example to evaluate the AI while it
+    learns. Training stops early if the callback returns True.
     """
 
-    player = NimAI()
+    if player is None:
+        player = NimAI(q=DictQTable(initial=initial) if q is None else q)
+    if isinstance(player.q, DictQTable) and not player.q:
+        player.q.initial = list(initial)
+    elif list(player.q.initial) != list(initial):
+        raise ValueError(f"Table is for initial piles {player.q.initial}, "
+                         f"not {list(initial)}")
 
     # Play n games
+    start = time.perf_counter()
+    played = 0
     for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
-
-        # Keep track of last move made by either player
-        last = {
-            0: {"state": None, "action": None},
-            1: {"state": None, "action": None}
-        }
-
-        # Game loop
-        while True:
-
-            # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
-
-            # Keep track of last state and action
-            last[game.player]["state"] = state
-            last[game.player]["action"] = action
-
-            # Make move
-            game.move(action)
-            new_state = game.piles.copy()
-
-            # When game is over, update Q values with rewards
-            if game.winner is not None:
-                player.update(state, action, new_state, -1)
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    1
-                )
+        if verbose:
+            print(f"Playing training game {i + 1}")
+        if callable(alpha):
+            player.alpha = alpha(i)
+        elif alpha is not None:
+            player.alpha = alpha
+        if callable(epsilon):
+            player.epsilon = epsilon(i)
+        elif epsilon is not None:
+            player.epsilon = epsilon
+
+        play_training_game(player, initial)
+        played += 1
+
+        if report_every and played % report_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"Played {played} training games "
+                  f"({played / elapsed:.0f} games/sec)")
+        if callback and played % callback_every == 0:
+            if callback(played, player):
                 break
 
-            # If game is continuing, no rewards yet
-            elif last[game.player]["state"] is not None:
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    0
-                )
-
-    print("Done training")
+    elapsed = time.perf_counter() - start
+    player.games_played = played
+    player.games_per_sec = played / elapsed if elapsed else 0
+    if verbose or report_every:
+        print(f"Done training ({player.games_per_sec:.0f} games/sec)")
 
     # Return the trained AI
     return player
 
 
+def play_training_game(player, initial=[1, 3, 5, 7]):
+    """
+    Play one game of the AI `player` against itself, updating its
+    Q-values as the game is played, or at the end of the game if the
+    AI uses lambda-returns.
+
+    This follows the rules of `Nim` but tracks the piles directly,
+    which avoids validating moves that the AI chose from the
+    available actions.
+    """
+    piles = list(initial)
+    remaining = sum(piles)
+    turn = 0
+
+    # Keep track of last state and action of either player, and of each
+    # player's transitions if they are only learned from at the end
+    last = [None, None]
+    deferred = bool(player.trace_decay)
+    transitions = [[], []]
+
+    def update(player_turn, old_state, action, new_state, reward):
+        if deferred:
+            transitions[player_turn].append(
+                (old_state, action, new_state, reward)
+            )
+        else:
+            player.update(old_state, action, new_state, reward)
+
+    # Game loop
+    while True:
+
+        # Choose an action and make the move
+        state = tuple(piles)
+        action = player.choose_action(state)
+        last[turn] = (state, action)
+        pile, count = action
+        piles[pile] -= count
+        remaining -= count
+        turn = 1 - turn
+        new_state = tuple(piles)
+
+        # When game is over, update Q values with rewards
+        if remaining == 0:
+            update(1 - turn, state, action, new_state, -1)
+            if last[turn] is not None:
+                update(turn, last[turn][0], last[turn][1], new_state, 1)
+            break
+
+        # If game is continuing, no rewards yet
+        elif last[turn] is not None:
+            update(turn, last[turn][0], last[turn][1], new_state, 0)
+
+    if deferred:
+        for player_transitions in transitions:
+            player.update_game(player_transitions)
+    player.end_game()
+
+
+def linear_schedule(start, end, games):
+    """
+    Return a function of the game number that moves linearly
+    from `start` to `end` over `games` games, then stays at `end`.
+    """
+    def schedule(i):
+        return start + (end - start) * min(i / games, 1)
+    return schedule
+
+
+def exponential_schedule(start, end, games):
+    """
+    Return a function of the game number that decays geometrically
+    from `start` to `end` over `games` games, then stays at `end`.
+    Both values must be positive.
+    """
+    def schedule(i):
+        return start * (end / start) ** min(i / games, 1)
+    return schedule
+
+
+def canonical_state(state):
+    """
+    Return the piles of `state` in sorted order, as a tuple, along with
+    the index in `state` of each sorted pile. Equal piles keep their order.
+    """
+    state = tuple(state)
+    result = CANONICAL_STATES.get(state)
+    if result is None:
+        order = tuple(sorted(range(len(state)), key=state.__getitem__))
+        result = (tuple(state[k] for k in order), order)
+        CANONICAL_STATES[state] = result
+    return result
+
+
+def canonical_actions(canonical):
+    """
+    Return the actions available in the sorted state `canonical`, taking
+    from only the first of several equal piles, since taking the same
+    number from any of them leads to the same sorted state.
+    """
+    actions = CANONICAL_ACTIONS.get(canonical)
+    if actions is None:
+        actions = tuple(
+            (i, j) for i, j in Nim.action_list(canonical)
+            if i == 0 or canonical[i] != canonical[i - 1]
+        )
+        CANONICAL_ACTIONS[canonical] = actions
+    return actions
+
+
+def canonical_key(state, action):
+    """
+    Return the sorted form of `state`, along with `action` renumbered to
+    take from the first pile of the same size in the sorted state.
+    """
+    canonical, _ = canonical_state(state)
+    i, j = action
+    return (canonical, (bisect.bisect_left(canonical, state[i]), j))
+
+
 def play(ai, human_player=None):
     """
     Play human game against the AI.
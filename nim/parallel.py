@@ -0,0 +1,142 @@
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from nim import ArrayQTable, NimAI, play_training_game
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how parallel self-play training scales "
+                    "with the number of worker processes."
+    )
+    parser.add_argument("-n", "--games", type=int, default=100000)
+    parser.add_argument("--initial", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--max-workers", type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--games-per-sync", type=int, default=1000)
+    parser.add_argument("--merge", choices=["average", "replay"],
+                        default="average")
+    parser.add_argument("--canonical", action="store_true",
+                        help="share Q-values between permutations of a state")
+    args = parser.parse_args()
+
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        train_parallel(
+            args.games, args.initial, workers=workers,
+            games_per_sync=args.games_per_sync, merge=args.merge,
+            canonical=args.canonical
+        )
+        elapsed = time.perf_counter() - start
+        results.append({
+            "workers": workers,
+            "seconds": elapsed,
+            "games_per_sec": args.games / elapsed,
+            "speedup": results[0]["seconds"] / elapsed if results else 1
+        })
+    print(json.dumps(results, indent=2))
+
+
+class RecordingAI(NimAI):
+    """
+    AI that remembers every update it makes, so that the updates can be
+    replayed into another AI's Q-learning table.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transitions = []
+
+    def update(self, old_state, action, new_state, reward):
+        self.transitions.append((old_state, action, new_state, reward))
+        super().update(old_state, action, new_state, reward)
+
+
+def train_parallel(n, initial=[1, 3, 5, 7], workers=None, games_per_sync=1000,
+                   merge="average", alpha=0.5, epsilon=0.1, seed=0,
+                   canonical=False):
+    """
+    Train an AI with an `ArrayQTable` by playing `n` games of self-play,
+    spread across `workers` processes.
+
+    Each worker starts from a copy of the master table and plays
+    `games_per_sync` games, updating its copy. The copies are then merged
+    into the master table and the next round starts from the result.
+
+    With `merge="average"`, each Q-value moves by the average change made
+    by the workers that updated it. With `merge="replay"`, workers return
+    every update they made, and these are replayed into the master table
+    one worker at a time.
+
+    If `canonical` is True, the table shares Q-values between states that
+    are permutations of each other.
+    """
+    if merge not in ("average", "replay"):
+        raise ValueError(f"Unknown merge {merge!r}")
+    workers = workers or multiprocessing.cpu_count()
+    player = NimAI(alpha=alpha, epsilon=epsilon,
+                   q=ArrayQTable(initial, canonical=canonical))
+
+    played = 0
+    rounds = 0
+    with multiprocessing.Pool(workers) as pool:
+        while played < n:
+            batch = min(games_per_sync * workers, n - played)
+            tasks = [
+                (player.q.values, initial, share, alpha, epsilon,
+                 seed + rounds * workers + k, merge == "replay", canonical)
+                for k, share in enumerate(split(batch, workers)) if share
+            ]
+            results = pool.map(self_play, tasks)
+
+            if merge == "average":
+                deltas = np.stack(results)
+                updated = np.count_nonzero(deltas, axis=0)
+                player.q.values += deltas.sum(axis=0) / np.maximum(updated, 1)
+            else:
+                for transitions in results:
+                    for transition in transitions:
+                        player.update(*transition)
+
+            played += batch
+            rounds += 1
+
+    return player
+
+
+def self_play(task):
+    """
+    Play games against itself from a copy of a Q-learning table.
+    Return the change to every Q-value, or the list of updates made if
+    `record` is True.
+    """
+    values, initial, games, alpha, epsilon, seed, record, canonical = task
+    random.seed(seed)
+    q = ArrayQTable(initial, dtype=values.dtype, canonical=canonical)
+    q.values[:] = values
+    if record:
+        player = RecordingAI(alpha=alpha, epsilon=epsilon, q=q)
+    else:
+        player = NimAI(alpha=alpha, epsilon=epsilon, q=q)
+    for _ in range(games):
+        play_training_game(player, initial)
+    if record:
+        return player.transitions
+    return q.values - values
+
+
+def split(total, parts):
+    """
+    Split `total` into `parts` integers that differ by at most 1.
+    """
+    return [total // parts + (k < total % parts) for k in range(parts)]
+
+
+if __name__ == "__main__":
+    main()
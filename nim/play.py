@@ -1,4 +1,13 @@
-from nim import train, play
+import os
 
-ai = train(10000)
+from nim import NimAI, train, play
+
+# Trained AI, reused by later games instead of training again
+FILENAME = os.path.join(os.path.dirname(__file__), "nim.qtable")
+
+if os.path.exists(FILENAME):
+    ai = NimAI.load(FILENAME)
+else:
+    ai = train(10000, verbose=False)
+    ai.save(FILENAME)
 play(ai)
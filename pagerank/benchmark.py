@@ -0,0 +1,137 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import crawler
+from generate import scale_free_graph
+import outofcore
+from pagerank import DAMPING, SAMPLES, iterate_pagerank, sample_pagerank
+import sampling
+import sparse
+
+# Tolerance of the reference ranks that the backends are compared with
+REFERENCE_TOLERANCE = 1e-14
+
+# Backends other than the solvers of `sparse.solve`
+BACKENDS = ["dict", "dict-sampling", "sampling", "outofcore"] + sparse.SOLVERS
+
+# Backends that are too slow to run on large graphs by default
+SLOW_BACKENDS = ["dict", "dict-sampling"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the time, memory and accuracy of PageRank "
+                    "backends on a corpus or on synthetic graphs."
+    )
+    parser.add_argument("--corpus", default=None,
+                        help="rank a corpus instead of synthetic graphs")
+    parser.add_argument("--pages", type=int, nargs="+",
+                        default=[1000, 10000, 100000],
+                        help="sizes of the synthetic graphs")
+    parser.add_argument("--damping", type=float, nargs="+", default=[DAMPING])
+    parser.add_argument("--tolerance", type=float, default=sparse.TOLERANCE)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=BACKENDS)
+    parser.add_argument("--samples-per-page", type=int, default=100,
+                        help="samples taken by the sampling backend")
+    parser.add_argument("--slow-limit", type=int, default=1000,
+                        help="only run the dict backends up to this size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.corpus is not None:
+        graphs = [(args.corpus, crawler.crawl_graph(args.corpus))]
+    else:
+        graphs = [
+            (f"scale-free-{pages}", scale_free_graph(pages, seed=args.seed))
+            for pages in args.pages
+        ]
+
+    results = []
+    for name, graph in graphs:
+        backends = [
+            backend for backend in args.backends
+            if backend not in SLOW_BACKENDS or len(graph) <= args.slow_limit
+        ]
+        for damping in args.damping:
+            for result in benchmark(graph, damping, backends, args.tolerance,
+                                    args.samples_per_page, args.seed):
+                result["graph"] = name
+                results.append(result)
+                print(json.dumps(result))
+
+
+def benchmark(graph, damping_factor, backends=BACKENDS,
+              tolerance=sparse.TOLERANCE, samples_per_page=100, seed=0):
+    """
+    Rank `graph` with each of `backends` and return, for each, the
+    seconds it took, the peak memory it allocated in megabytes, the
+    number of iterations where there are any, and the L1 distance of its
+    ranks from reference ranks computed to a much smaller tolerance.
+
+    The vectorized sampler takes `samples_per_page` samples per page, but
+    the dict sampler, whose steps take time proportional to the number of
+    pages, only takes `SAMPLES` samples as in `pagerank.py`.
+
+    Each backend is run twice: once to time it, and once to measure its
+    memory with `tracemalloc`, which would slow it down.
+    """
+    matrix = sparse.transition_matrix(graph)
+    reference, _ = sparse.power_iteration(
+        graph, damping_factor, tolerance=REFERENCE_TOLERANCE,
+        max_iterations=100 * sparse.MAX_ITERATIONS, matrix=matrix
+    )
+    samples = samples_per_page * len(graph)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if "outofcore" in backends:
+            outofcore.write_graph(directory, graph)
+
+        def run(backend):
+            if backend == "dict":
+                ranks = iterate_pagerank(graph.to_corpus(), damping_factor)
+                return [ranks[name] for name in graph.names], None
+            if backend == "dict-sampling":
+                ranks = sample_pagerank(graph.to_corpus(), damping_factor,
+                                        SAMPLES)
+                return [ranks[name] for name in graph.names], None
+            if backend == "sampling":
+                return sampling.sample_ranks(graph, damping_factor, samples,
+                                             seed=seed), None
+            if backend == "outofcore":
+                return outofcore.pagerank(outofcore.EdgeFiles(directory),
+                                          damping_factor, tolerance=tolerance)
+            return sparse.solve(graph, damping_factor, backend,
+                                tolerance=tolerance)
+
+        results = []
+        for backend in backends:
+            start = time.perf_counter()
+            ranks, iterations = run(backend)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            run(backend)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({
+                "pages": len(graph),
+                "links": graph.edges,
+                "damping": damping_factor,
+                "backend": backend,
+                "iterations": iterations,
+                "seconds": seconds,
+                "memory_mb": peak / 1e6,
+                "error": float(np.abs(np.asarray(ranks) - reference).sum())
+            })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import os
+import posixpath
+import re
+import time
+
+import numpy as np
+
+from graph import Graph
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Number of characters read from a page at a time
+CHUNK_SIZE = 1 << 16
+
+# Pages handed to a worker process at a time
+PAGES_PER_TASK = 64
+
+# Name of the graph cache kept in a corpus directory by default
+CACHE = ".pagerank.graph"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a directory of HTML pages and report throughput."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--processes", action="store_true",
+                        help="parse pages in processes rather than threads")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse the saved graph if no page has changed")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.cache:
+        graph = cached_graph(args.directory, workers=args.workers,
+                             processes=args.processes)
+    else:
+        graph = crawl_graph(args.directory, workers=args.workers,
+                            processes=args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"Crawled {len(graph)} pages with {graph.edges} links "
+          f"in {elapsed:.2f} seconds ({len(graph) / elapsed:.0f} pages/sec)")
+
+
+def crawl_graph(directory, workers=None, processes=False):
+    """
+    Parse every HTML page in `directory` and its subdirectories, with
+    `workers` threads, and return the links between them as a `Graph`.
+    If `processes` is True, pages are parsed in `workers` processes
+    instead, which is faster for large pages since parsing holds the GIL.
+
+    Pages are named by their path relative to `directory`, with "/"
+    between directories, so pages at the top level are named by their
+    filename as in `crawl`. Links are resolved relative to the directory
+    of the page they are on; links to the page itself or to pages outside
+    the corpus are left out.
+    """
+    names = list_pages(directory)
+    index = {name: k for k, name in enumerate(names)}
+    parse = functools.partial(page_links, directory)
+
+    if processes:
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+        chunksize = PAGES_PER_TASK
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        chunksize = 1
+
+    # Replace the names of linked pages with their ids as pages are parsed.
+    with executor:
+        links = []
+        for page, page_names in enumerate(
+            executor.map(parse, names, chunksize=chunksize)
+        ):
+            page_ids = set(index.get(name, page) for name in page_names)
+            page_ids.discard(page)
+            links.append(sorted(page_ids))
+
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(page_ids) for page_ids in links], out=indptr[1:])
+    indices = np.fromiter(
+        (link for page_ids in links for link in page_ids),
+        dtype=np.int32, count=indptr[-1]
+    )
+    return Graph(names, indptr, indices)
+
+
+def page_links(directory, name):
+    """
+    Return the set of names of the pages linked to by page `name` in
+    `directory`, resolved relative to the directory of the page.
+    """
+    base = posixpath.dirname(name)
+    return set(
+        posixpath.normpath(posixpath.join(base, link))
+        for link in read_links(os.path.join(directory, name))
+    )
+
+
+def cached_graph(directory, cache=None, workers=None, processes=False):
+    """
+    Return the graph of `directory` from the graph file `cache`, by
+    default `CACHE` in `directory`, if the pages have not changed since it
+    was saved. Otherwise, crawl the directory with `crawl_graph` and save
+    the graph to `cache` for next time. A cache file that cannot be read
+    is crawled again and replaced.
+    """
+    if cache is None:
+        cache = os.path.join(directory, CACHE)
+    names = list_pages(directory)
+    signature = corpus_signature(directory, names)
+    if os.path.exists(cache):
+        try:
+            graph = Graph.load(cache, signature)
+        except (ValueError, OSError):
+            graph = None
+        if graph is not None:
+            return graph
+
+    graph = crawl_graph(directory, workers=workers, processes=processes)
+    graph.save(cache, signature)
+    return graph
+
+
+def corpus_signature(directory, names):
+    """
+    Return a dictionary that changes whenever a page named in `names` in
+    `directory` is added, removed, renamed or modified: the number of
+    pages, and a hash of the name, modification time and size of each,
+    so that a page replaced by an older file of the same size is noticed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in names:
+        stat = os.stat(os.path.join(directory, name))
+        digest.update(f"{name}\0{stat.st_mtime_ns}\0{stat.st_size}\0"
+                      .encode())
+    return {"pages": len(names), "pages_hash": digest.hexdigest()}
+
+
+def list_pages(directory):
+    """
+    Return the names of the HTML pages in `directory` and its
+    subdirectories, relative to `directory`, in sorted order.
+    """
+    names = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        relative = os.path.relpath(root, directory)
+        for filename in sorted(files):
+            if not filename.endswith(".html"):
+                continue
+            if relative == os.curdir:
+                names.append(filename)
+            else:
+                names.append(posixpath.join(
+                    relative.replace(os.sep, "/"), filename
+                ))
+    return names
+
+
+def read_links(path):
+    """
+    Return the set of link targets in the HTML page at `path`, reading it
+    `CHUNK_SIZE` characters at a time rather than all at once.
+
+    Text from the last "<" of a chunk onwards may be an unfinished tag, so
+    it is kept and searched together with the next chunk.
+    """
+    links = set()
+    tail = ""
+    with open(path, errors="replace") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            text = tail + chunk
+            cut = text.rfind("<")
+            if cut == -1:
+                cut = len(text)
+            links.update(LINK.findall(text, 0, cut))
+            tail = text[cut:]
+    links.update(LINK.findall(tail))
+    return links
+
+
+if __name__ == "__main__":
+    main()
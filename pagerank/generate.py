@@ -0,0 +1,112 @@
+import argparse
+import os
+
+import numpy as np
+
+from graph import Graph
+
+# Pages generated at a time
+CHUNK_PAGES = 1 << 20
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic scale-free link graph."
+    )
+    parser.add_argument("pages", type=int)
+    parser.add_argument("output",
+                        help="graph file, or directory with --html")
+    parser.add_argument("--exponent", type=float, default=2.1,
+                        help="power-law exponent of links per page")
+    parser.add_argument("--dangling", type=float, default=0.1,
+                        help="fraction of pages without links")
+    parser.add_argument("--max-links", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--html", action="store_true",
+                        help="write a corpus of HTML pages instead")
+    args = parser.parse_args()
+
+    graph = scale_free_graph(args.pages, exponent=args.exponent,
+                             dangling=args.dangling, max_links=args.max_links,
+                             seed=args.seed)
+    if args.html:
+        write_html(args.output, graph)
+    else:
+        graph.save(args.output)
+    print(f"Generated {len(graph)} pages with {graph.edges} links "
+          f"({np.count_nonzero(graph.dangling)} without links)")
+
+
+def scale_free_graph(pages, exponent=2.1, dangling=0.1, max_links=1000,
+                     seed=0):
+    """
+    Return a random `Graph` of `pages` pages, named by number, in which
+    both the number of links on a page and the number of links to a page
+    follow power laws, as on the web.
+
+    Each page has a number of links drawn from a Zipf distribution with
+    `exponent`, at most `max_links`, except for a `dangling` fraction of
+    pages that have none. Link targets are drawn with probability
+    proportional to a popularity that falls off as a power of a random
+    ranking of the pages, so a few pages receive most links. Random links
+    form many cycles. Links to the page itself and repeated links are
+    dropped.
+
+    Pages are generated `CHUNK_PAGES` at a time, so that only the graph
+    itself grows with `pages`.
+    """
+    rng = np.random.default_rng(seed)
+    outdegree = np.minimum(rng.zipf(exponent, pages), max_links)
+    outdegree[rng.random(pages) < dangling] = 0
+
+    # Popularity of the page at each rank, and the page at each rank
+    popularity = np.arange(1, pages + 1, dtype=np.float64) ** (
+        -1 / (exponent - 1)
+    )
+    cumulative = np.cumsum(popularity)
+    cumulative /= cumulative[-1]
+    ranking = rng.permutation(pages).astype(np.int32)
+    del popularity
+
+    indices = []
+    counts = np.zeros(pages, dtype=np.int64)
+    for start in range(0, pages, CHUNK_PAGES):
+        end = min(start + CHUNK_PAGES, pages)
+        sources = np.repeat(np.arange(start, end), outdegree[start:end])
+        picks = np.searchsorted(cumulative, rng.random(len(sources)))
+        targets = ranking[np.minimum(picks, pages - 1)]
+
+        # Sort links by source and target, dropping repeats and self-links.
+        keys = np.unique((sources - start) * pages + targets)
+        sources = start + keys // pages
+        targets = (keys % pages).astype(np.int32)
+        keep = sources != targets
+        counts[start:end] = np.bincount(sources[keep] - start,
+                                        minlength=end - start)
+        indices.append(targets[keep])
+
+    indptr = np.zeros(pages + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return Graph(range(pages), indptr,
+                 np.concatenate(indices) if indices else [])
+
+
+def write_html(directory, graph):
+    """
+    Write `graph` to `directory` as a corpus of HTML pages, one file
+    "k.html" for each page `k`, that `crawl` reads back as the same graph.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page in range(len(graph)):
+        links = "".join(
+            f'<li><a href="{graph.names[k]}.html">{graph.names[k]}</a></li>\n'
+            for k in graph.links(page)
+        )
+        with open(os.path.join(directory, f"{graph.names[page]}.html"),
+                  "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n<ul>\n{links}"
+                    f"</ul>\n</body>\n</html>\n")
+
+
+if __name__ == "__main__":
+    main()
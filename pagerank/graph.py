@@ -0,0 +1,175 @@
+import functools
+import json
+import os
+import struct
+
+import numpy as np
+
+# Graph files start with this magic string and the length of a JSON header;
+# the arrays follow, aligned to GRAPH_ALIGNMENT bytes.
+GRAPH_MAGIC = b"PRGRAPH1"
+GRAPH_ALIGNMENT = 64
+
+
+class Graph():
+
+    def __init__(self, names, indptr, indices):
+        """
+        Link graph of a corpus in compressed sparse row (CSR) form.
+         - `names` is a list of page names; page `k` is `names[k]`
+         - the pages linked to by page `k` are
+           `indices[indptr[k]:indptr[k + 1]]`
+
+        Pages are referred to by their integer position in `names`, so the
+        graph is stored in a few arrays rather than as sets of strings.
+        `names` may be a `range`, to name pages by their position without
+        storing a name for each.
+        """
+        self.names = names if isinstance(names, range) else list(names)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        if len(self.indptr) != len(self.names) + 1:
+            raise ValueError("indptr must have one more entry than names")
+
+        # Number of links of each page, and which pages have none
+        self.outdegree = np.diff(self.indptr)
+        self.dangling = self.outdegree == 0
+
+    @functools.cached_property
+    def index(self):
+        """
+        Dictionary mapping each page name to its position.
+        """
+        return {name: k for k, name in enumerate(self.names)}
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Return the graph of `corpus`, a dictionary mapping each page to
+        the set of pages it links to, as returned by `crawl`.
+        """
+        return cls.from_links(list(corpus), list(corpus.values()))
+
+    @classmethod
+    def from_links(cls, names, links):
+        """
+        Return the graph of the pages `names`, where page `k` links to the
+        pages named in `links[k]`. Links to the page itself or to pages
+        that are not in `names` are left out.
+        """
+        index = {name: k for k, name in enumerate(names)}
+        indptr = [0]
+        indices = []
+        for page, page_links in enumerate(links):
+            page_ids = set(index.get(name, page) for name in page_links)
+            page_ids.discard(page)
+            indices.extend(sorted(page_ids))
+            indptr.append(len(indices))
+        return cls(names, indptr, indices)
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary mapping each page to the set of
+        pages it links to, like `crawl` does.
+        """
+        return {
+            name: set(self.names[k] for k in self.links(page))
+            for page, name in enumerate(self.names)
+        }
+
+    def save(self, filename, signature=None):
+        """
+        Save the graph to `filename` as a binary file: a JSON header with
+        the number of pages and links and `signature`, which identifies
+        what the graph was made from, followed by the page names separated
+        by NUL characters and the raw CSR arrays.
+
+        The graph is written to a temporary file that then replaces
+        `filename`, so a reader never sees a partly written graph.
+        """
+        names = "\0".join(map(str, self.names)).encode()
+        header = {
+            "pages": len(self),
+            "edges": self.edges,
+            "names": len(names),
+            "signature": signature
+        }
+        header = json.dumps(header).encode()
+        prefix = len(GRAPH_MAGIC) + 4
+        header += b" " * (padding(prefix + len(header)) - prefix - len(header))
+        names += b"\0" * (padding(len(names)) - len(names))
+
+        temporary = f"{filename}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(GRAPH_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(names)
+            f.write(self.indptr.astype(np.int64).tobytes())
+            f.write(self.indices.astype(np.int32).tobytes())
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, signature=None):
+        """
+        Load a graph saved with `Graph.save` from `filename`. If
+        `signature` is given, return None instead if the graph was saved
+        with a different signature, before reading any arrays.
+
+        Raise ValueError if the file is not a graph file or is truncated.
+        """
+        with open(filename, "rb") as f:
+            if f.read(len(GRAPH_MAGIC)) != GRAPH_MAGIC:
+                raise ValueError(f"{filename} is not a graph file")
+            prefix = f.read(4)
+            if len(prefix) != 4:
+                raise ValueError(f"{filename} is truncated")
+            length, = struct.unpack("<I", prefix)
+            header = json.loads(f.read(length))
+            if signature is not None and header["signature"] != signature:
+                return None
+            names = f.read(header["names"])
+            if len(names) != header["names"]:
+                raise ValueError(f"{filename} is truncated")
+            names = names.decode()
+            offset = f.tell() + padding(header["names"]) - header["names"]
+
+        pages = header["pages"]
+        edges = header["edges"]
+        indptr = np.fromfile(filename, dtype=np.int64, count=pages + 1,
+                             offset=offset)
+        indices = np.fromfile(filename, dtype=np.int32, count=edges,
+                              offset=offset + 8 * (pages + 1))
+        if (len(indptr) != pages + 1 or len(indices) != edges
+                or indptr[-1] != edges):
+            raise ValueError(f"{filename} is truncated")
+        return cls(names.split("\0") if pages else [], indptr, indices)
+
+    def links(self, page):
+        """
+        Return the pages linked to by page `page`.
+        """
+        return self.indices[self.indptr[page]:self.indptr[page + 1]]
+
+    def sources(self):
+        """
+        Return the page that each link in `indices` comes from.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.outdegree)
+
+    @property
+    def edges(self):
+        """
+        Number of links in the graph.
+        """
+        return len(self.indices)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def padding(size):
+    """
+    Return `size` rounded up to a multiple of `GRAPH_ALIGNMENT`.
+    """
+    return -(-size // GRAPH_ALIGNMENT) * GRAPH_ALIGNMENT
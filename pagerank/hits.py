@@ -0,0 +1,50 @@
+import argparse
+
+import crawler
+from graph import Graph
+from pagerank import DAMPING
+import sparse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus by PageRank and by HITS hub "
+                    "and authority scores, crawling it only once."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--solver", choices=sparse.SOLVERS, default="power",
+                        help="iterative solver of PageRank")
+    parser.add_argument("--cache", action="store_true",
+                        help="save the parsed links and reuse them next time")
+    args = parser.parse_args()
+
+    if args.cache:
+        graph = crawler.cached_graph(args.corpus)
+    else:
+        graph = crawler.crawl_graph(args.corpus)
+    ranks, iterations = sparse.solve(graph, DAMPING, args.solver)
+    hubs, authorities, hits_iterations = sparse.hits_iteration(graph)
+
+    print(f"PageRank Results from Iteration ({iterations} iterations)")
+    print(f"HITS Results from Iteration ({hits_iterations} iterations)")
+    width = max([len("page")] + [len(name) for name in graph.names])
+    print(f"  {'page':<{width}} {'pagerank':>8} {'hub':>8} {'authority':>9}")
+    for k in sorted(range(len(graph)), key=graph.names.__getitem__):
+        print(f"  {graph.names[k]:<{width}} {ranks[k]:8.4f} {hubs[k]:8.4f} "
+              f"{authorities[k]:9.4f}")
+
+
+def hits(corpus):
+    """
+    Return HITS hub and authority scores for each page of `corpus`, as
+    two dictionaries where keys are page names and values are scores that
+    sum to 1, like `iterate_pagerank`.
+    """
+    graph = Graph.from_corpus(corpus)
+    hubs, authorities, _ = sparse.hits_iteration(graph)
+    return (dict(zip(graph.names, hubs.tolist())),
+            dict(zip(graph.names, authorities.tolist())))
+
+
+if __name__ == "__main__":
+    main()
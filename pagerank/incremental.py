@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+import crawler
+from graph import Graph
+from pagerank import DAMPING
+import sparse
+
+# Name of the cache file kept in a corpus directory by default
+CACHE = ".pagerank.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus, reusing the crawl and the "
+                    "ranks of the last run for pages that have not changed."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--cache", default=None,
+                        help=f"cache file (default: CORPUS/{CACHE})")
+    args = parser.parse_args()
+    cache = args.cache or os.path.join(args.corpus, CACHE)
+
+    previous = load_cache(cache)
+    graph, entries, parsed = crawl_cached(args.corpus, previous["pages"])
+    ranks, iterations = update_pagerank(graph, DAMPING, previous["ranks"])
+    save_cache(cache, entries, dict(zip(graph.names, ranks.tolist())))
+
+    print(f"Parsed {parsed} of {len(graph)} pages, "
+          f"converged in {iterations} iterations")
+    print("PageRank Results from Iteration")
+    for k in sorted(range(len(graph)), key=graph.names.__getitem__):
+        print(f"  {graph.names[k]}: {ranks[k]:.4f}")
+
+
+def load_cache(filename):
+    """
+    Return the contents of the cache file `filename`, or an empty cache if
+    there is none or it cannot be decoded. A cache has
+        - `pages`: a dictionary mapping each page name to a list of its
+          modification time in nanoseconds, its size, and the names of
+          the pages it links to
+        - `ranks`: a dictionary mapping each page name to its last rank
+    """
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"pages": {}, "ranks": {}}
+
+
+def save_cache(filename, pages, ranks):
+    """
+    Write the crawl results `pages` and the ranks `ranks` to the cache
+    file `filename`, in the format returned by `load_cache`.
+
+    The cache is written to a temporary file that then replaces
+    `filename`, so an interrupted run leaves the old cache intact.
+    """
+    temporary = f"{filename}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({"pages": pages, "ranks": ranks}, f, separators=(",", ":"))
+    os.replace(temporary, filename)
+
+
+def crawl_cached(directory, cached):
+    """
+    Crawl `directory` like `crawler.crawl_graph`, but only parse pages
+    that are not in the cache entries `cached` or whose modification time
+    or size has changed since.
+
+    Return the graph, the cache entries of the current pages and the
+    number of pages that were parsed.
+    """
+    entries = dict()
+    parsed = 0
+    for name in crawler.list_pages(directory):
+        stat = os.stat(os.path.join(directory, name))
+        entry = cached.get(name)
+        if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_size]:
+            links = sorted(crawler.page_links(directory, name))
+            entry = [stat.st_mtime_ns, stat.st_size, links]
+            parsed += 1
+        entries[name] = entry
+
+    names = list(entries)
+    graph = Graph.from_links(names, [entries[name][2] for name in names])
+    return graph, entries, parsed
+
+
+def apply_changes(graph, added_pages=(), removed_pages=(), added_links=(),
+                  removed_links=()):
+    """
+    Return a copy of `graph` with pages added and removed, by name, and
+    links `(source, target)` between named pages added and removed.
+    Links to and from removed pages are removed with them. Raise
+    ValueError if a link is between pages that are not in the graph or
+    being added.
+    """
+    corpus = graph.to_corpus()
+    for name in added_pages:
+        corpus.setdefault(name, set())
+    for source, target in list(added_links) + list(removed_links):
+        for name in (source, target):
+            if name not in corpus:
+                raise ValueError(f"{name} is not a page of the graph")
+    for source, target in added_links:
+        corpus[source].add(target)
+    for source, target in removed_links:
+        corpus[source].discard(target)
+    removed = set(removed_pages)
+    return Graph.from_links(
+        [name for name in corpus if name not in removed],
+        [corpus[name] - removed for name in corpus if name not in removed]
+    )
+
+
+def update_pagerank(graph, damping_factor, previous,
+                    tolerance=sparse.TOLERANCE):
+    """
+    Return the PageRank of every page of `graph` and the number of
+    iterations taken, starting from `previous`, a dictionary of the ranks
+    of each page before the graph changed.
+
+    New pages start with rank 1 / N, and the starting ranks are scaled to
+    sum to 1. When only a few pages have changed, the starting ranks are
+    already close, so iteration only has to converge the difference.
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0), 0
+    ranks = np.array([previous.get(name, 1 / n) for name in graph.names])
+    ranks /= ranks.sum()
+    return sparse.power_iteration(graph, damping_factor, tolerance=tolerance,
+                                  ranks=ranks)
+
+
+if __name__ == "__main__":
+    main()
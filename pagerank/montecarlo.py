@@ -0,0 +1,131 @@
+import argparse
+import multiprocessing
+import statistics
+
+import numpy as np
+
+from graph import Graph
+from pagerank import DAMPING, crawl
+import sampling
+
+# Steps each surfer takes per batch, and the fewest batches used to
+# estimate the error
+BATCH_STEPS = 100
+MIN_BATCHES = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate PageRank by sampling, with confidence intervals."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--error", type=float, default=0.001,
+                        help="stop once every interval is this narrow")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--walkers", type=int, default=1000,
+                        help="surfers per process")
+    parser.add_argument("--max-samples", type=int, default=10 ** 9)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    graph = Graph.from_corpus(crawl(args.corpus))
+    ranks, errors, samples = monte_carlo_pagerank(
+        graph, DAMPING, error=args.error, confidence=args.confidence,
+        processes=args.processes, walkers=args.walkers,
+        max_samples=args.max_samples, seed=args.seed
+    )
+    print(f"PageRank Results from Sampling (n = {samples}, "
+          f"{args.confidence:.0%} confidence)")
+    for k in sorted(range(len(graph)), key=graph.names.__getitem__):
+        print(f"  {graph.names[k]}: {ranks[k]:.4f} ± {errors[k]:.4f}")
+
+
+def monte_carlo_pagerank(graph, damping_factor, error=0.001, confidence=0.95,
+                         processes=None, walkers=1000, max_samples=10 ** 9,
+                         seed=0):
+    """
+    Estimate the PageRank of every page of `graph` by sampling, as
+    `sample_pagerank` does, with `walkers` surfers in each of `processes`
+    worker processes.
+
+    Surfers take `BATCH_STEPS` steps at a time, and the visits of each
+    worker in each round form one batch. The spread of the batch estimates
+    gives the standard error of the overall estimate, from which the
+    half-width of a `confidence` interval for each page is computed.
+    Sampling stops once every half-width is at most `error`, or after
+    about `max_samples` samples.
+
+    Return the estimated ranks and half-widths as arrays, along with the
+    number of samples taken.
+    """
+    n = len(graph)
+    workers = processes or multiprocessing.cpu_count()
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    batch_size = walkers * BATCH_STEPS
+
+    counts = np.zeros(n, dtype=np.int64)
+    sums = np.zeros(n)
+    squares = np.zeros(n)
+    batches = 0
+    pages = [None] * workers
+    errors = np.full(n, np.inf)
+
+    with multiprocessing.Pool(
+        workers, initializer=start_worker, initargs=(graph,)
+    ) as pool:
+        rounds = 0
+        while counts.sum() < max_samples:
+            tasks = [
+                (damping_factor, walkers, (seed, k, rounds), pages[k])
+                for k in range(workers)
+            ]
+            for k, (batch, ends) in enumerate(pool.map(walk_batch, tasks)):
+                pages[k] = ends
+                estimate = batch / batch_size
+                counts += batch
+                sums += estimate
+                squares += estimate ** 2
+                batches += 1
+            rounds += 1
+
+            # Standard error of the mean of the batch estimates
+            if batches >= MIN_BATCHES:
+                means = sums / batches
+                variances = np.maximum(squares / batches - means ** 2, 0)
+                errors = z * np.sqrt(variances / (batches - 1))
+                if errors.max() <= error:
+                    break
+
+    total = counts.sum()
+    return counts / total, errors, int(total)
+
+
+def start_worker(graph):
+    """
+    Keep the graph in a worker process, so that it is sent to each worker
+    only once rather than with every batch.
+    """
+    global GRAPH
+    GRAPH = graph
+
+
+def walk_batch(task):
+    """
+    Take one batch of samples in a worker process, continuing from the
+    pages the worker's surfers ended on in the last batch, if any.
+    """
+    damping_factor, walkers, seed, start = task
+    rng = np.random.default_rng(seed)
+    if start is not None:
+        # Leave out the pages the surfers start on, which were counted as
+        # the end of the last batch.
+        counts, pages = sampling.walk(GRAPH, damping_factor,
+                                      BATCH_STEPS + 1, walkers, rng, start)
+        counts -= np.bincount(start, minlength=len(GRAPH))
+        return counts, pages
+    return sampling.walk(GRAPH, damping_factor, BATCH_STEPS, walkers, rng)
+
+
+if __name__ == "__main__":
+    main()
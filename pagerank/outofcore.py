@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+import crawler
+from pagerank import DAMPING
+import sparse
+
+# Number of links read from the edge files at a time
+BLOCK_SIZE = 1 << 22
+
+# Files of a directory of edge files
+HEADER = "header.json"
+NAMES = "names.txt"
+SOURCES = "sources.i32"
+TARGETS = "targets.i32"
+OUTDEGREE = "outdegree.i32"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank pages from link files on disk, keeping only the "
+                    "rank vectors in memory."
+    )
+    parser.add_argument("edges", help="directory of edge files")
+    parser.add_argument("--corpus", default=None,
+                        help="crawl CORPUS and write its edge files first")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of highest-ranked pages to print")
+    args = parser.parse_args()
+
+    if args.corpus is not None:
+        write_graph(args.edges, crawler.crawl_graph(args.corpus))
+
+    edges = EdgeFiles(args.edges)
+    ranks, iterations = pagerank(edges, DAMPING)
+    names = edges.names()
+    print(f"PageRank Results from Iteration ({edges.pages} pages, "
+          f"{edges.edges} links, {iterations} iterations)")
+    for k in np.argsort(-ranks, kind="stable")[:args.top]:
+        print(f"  {names[k] if names else k}: {ranks[k]:.4f}")
+
+
+def write_edge_files(directory, pages, chunks, names=None):
+    """
+    Write the links between `pages` pages to `directory` as binary int32
+    arrays of sources and targets, sorted by target, along with the number
+    of links of each page and, if given, the page `names`.
+
+    `chunks` is a function that returns an iterator of `(sources, targets)`
+    arrays of links. It is called twice: once to count the links to each
+    page, and once to place each link at its sorted position in the
+    memory-mapped output, so that the links never have to be in memory
+    all at once.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # Count the links from and to each page.
+    outdegree = np.zeros(pages, dtype=np.int64)
+    indegree = np.zeros(pages, dtype=np.int64)
+    for sources, targets in chunks():
+        outdegree += np.bincount(sources, minlength=pages)
+        indegree += np.bincount(targets, minlength=pages)
+    edges = int(indegree.sum())
+
+    # Place each link after the links to earlier targets, and after the
+    # links to the same target that came before it.
+    offsets = np.zeros(pages, dtype=np.int64)
+    np.cumsum(indegree[:-1], out=offsets[1:])
+    out_sources = open_array(directory, SOURCES, edges, "w+")
+    out_targets = open_array(directory, TARGETS, edges, "w+")
+    for sources, targets in chunks():
+        order = np.argsort(targets, kind="stable")
+        sorted_targets = targets[order]
+        groups, first, counts = np.unique(
+            sorted_targets, return_index=True, return_counts=True
+        )
+        within = np.arange(len(order)) - np.repeat(first, counts)
+        positions = offsets[sorted_targets] + within
+        out_sources[positions] = sources[order]
+        out_targets[positions] = sorted_targets
+        offsets[groups] += counts
+    if edges:
+        out_sources.flush()
+        out_targets.flush()
+    del out_sources, out_targets
+
+    outdegree.astype(np.int32).tofile(os.path.join(directory, OUTDEGREE))
+    if names is not None:
+        with open(os.path.join(directory, NAMES), "w") as f:
+            for name in names:
+                f.write(f"{name}\n")
+    with open(os.path.join(directory, HEADER), "w") as f:
+        json.dump({"pages": pages, "edges": edges}, f)
+
+
+def write_graph(directory, graph):
+    """
+    Write the links of the `Graph` `graph` to `directory` as edge files,
+    reading its arrays `BLOCK_SIZE` links at a time.
+    """
+    def chunks():
+        for start in range(0, graph.edges, BLOCK_SIZE):
+            end = min(start + BLOCK_SIZE, graph.edges)
+            sources = np.searchsorted(
+                graph.indptr, np.arange(start, end), side="right"
+            ) - 1
+            yield sources.astype(np.int32), graph.indices[start:end]
+
+    write_edge_files(directory, len(graph), chunks, graph.names)
+
+
+def open_array(directory, filename, length, mode="r"):
+    """
+    Return the int32 file `filename` in `directory`, of `length` values,
+    as a memory-mapped array.
+    """
+    if length == 0:
+        if mode == "w+":
+            open(os.path.join(directory, filename), "wb").close()
+        return np.zeros(0, dtype=np.int32)
+    return np.memmap(os.path.join(directory, filename), dtype=np.int32,
+                     mode=mode, shape=(length,))
+
+
+class EdgeFiles():
+
+    def __init__(self, directory):
+        """
+        Open the edge files written to `directory` by `write_edge_files`.
+        The arrays are memory-mapped, so they are read from disk as they
+        are used.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, HEADER)) as f:
+            header = json.load(f)
+        self.pages = header["pages"]
+        self.edges = header["edges"]
+        self.sources = open_array(directory, SOURCES, self.edges)
+        self.targets = open_array(directory, TARGETS, self.edges)
+        self.outdegree = open_array(directory, OUTDEGREE, self.pages)
+
+    def names(self):
+        """
+        Return the list of page names, or None if none were written.
+        """
+        path = os.path.join(self.directory, NAMES)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().splitlines()
+
+
+def pagerank(edges, damping_factor, tolerance=sparse.TOLERANCE,
+             max_iterations=sparse.MAX_ITERATIONS, block_size=BLOCK_SIZE):
+    """
+    Return the PageRank of every page of the `EdgeFiles` `edges` and the
+    number of iterations taken, computed like `sparse.power_iteration`.
+
+    Each iteration reads the links `block_size` at a time. Since links
+    are sorted by target, each block adds to the new ranks of a contiguous
+    range of pages, so only the rank vectors are kept in memory.
+    """
+    n = edges.pages
+    if n == 0:
+        return np.zeros(0), 0
+    ranks = np.full(n, 1 / n)
+    scaled = np.empty(n)
+
+    for iteration in range(1, max_iterations + 1):
+        # Rank that each page passes along each of its links, and the
+        # total rank of pages without links
+        dangling = 0
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            outdegree = edges.outdegree[start:end]
+            dangling += ranks[start:end][outdegree == 0].sum()
+            np.divide(ranks[start:end], outdegree, out=scaled[start:end],
+                      where=outdegree > 0)
+            scaled[start:end][outdegree == 0] = 0
+
+        new_ranks = np.full(n, (1 - damping_factor + damping_factor
+                                * dangling) / n)
+        for start in range(0, edges.edges, block_size):
+            end = min(start + block_size, edges.edges)
+            targets = edges.targets[start:end]
+            first = int(targets[0])
+            last = int(targets[-1])
+            new_ranks[first:last + 1] += damping_factor * np.bincount(
+                targets - first, weights=scaled[edges.sources[start:end]]
+            )
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,57 @@
-import os
+import argparse
+import collections
 import random
-import re
-import sys
+
+import crawler
+from graph import Graph
+import sampling
+import sparse
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Backends of sample_pagerank and iterate_pagerank
+BACKENDS = ["dict", "sparse"]
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus.")
+    parser.add_argument("corpus")
+    parser.add_argument("--backend", choices=BACKENDS, default="dict",
+                        help="how the ranks are computed")
+    parser.add_argument("--solver", choices=sparse.SOLVERS, default="power",
+                        help="iterative solver of the sparse backend")
+    parser.add_argument("--cache", action="store_true",
+                        help="save the parsed links and reuse them next time")
+    args = parser.parse_args()
+    if args.backend != "sparse" and args.solver != "power":
+        parser.error("--solver requires --backend sparse")
+
+    corpus = crawl(args.corpus, cache=args.cache)
+    ranks = sample_pagerank(corpus, DAMPING, SAMPLES, backend=args.backend)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks = iterate_pagerank(corpus, DAMPING, backend=args.backend,
+                             solver=args.solver)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, cache=False):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
 
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    Pages in subdirectories are included too; see `crawler.crawl_graph`.
+    If `cache` is True, the parsed links are saved in the directory and
+    reused until a page changes; see `crawler.cached_graph`.
+    """
+    if cache:
+        return crawler.cached_graph(directory).to_corpus()
+    return crawler.crawl_graph(directory).to_corpus()
 
 
 def transition_model(corpus, page, damping_factor):
@@ -83,7 +89,7 @@ def transition_model(corpus, page, damping_factor):
     return distribution
      
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, backend="dict"):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -91,7 +97,17 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    With `backend="sparse"`, the corpus is converted to arrays of links
+    once and many surfers are moved at once with `sampling.sample_ranks`.
     """
+    if backend == "sparse":
+        graph = Graph.from_corpus(corpus)
+        ranks = sampling.sample_ranks(graph, damping_factor, n)
+        return dict(zip(graph.names, ranks.tolist()))
+    if backend != "dict":
+        raise ValueError(f"Unknown backend {backend!r}")
+
     pagerank = {}
     samples = []
     num_pages = len(corpus)
@@ -107,9 +123,11 @@ def sample_pagerank(corpus, damping_factor, n):
         page = choice(distribution)
         samples.append(page)
 
-    # Add the pagerank to each page by dividing the count in samples by n.
+    # Add the pagerank to each page by dividing its count in the samples
+    # by the number of samples.
+    counts = collections.Counter(samples)
     for p in corpus:
-        pagerank[p] = samples.count(p) / n
+        pagerank[p] = counts[p] / len(samples)
 
     return pagerank
 
@@ -132,7 +150,7 @@ def choice(distribution):
     return page
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, backend="dict", solver="power"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -140,7 +158,23 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    With `backend="dict"`, ranks are updated page by page until none
+    changes by more than 0.001. With `backend="sparse"`, the corpus is
+    converted to a sparse matrix once and ranks are updated all at once
+    until their total change is below `sparse.TOLERANCE`, using the
+    `solver` named in `sparse.SOLVERS`; the dict backend only supports
+    "power".
     """
+    if backend == "sparse":
+        graph = Graph.from_corpus(corpus)
+        ranks, _ = sparse.solve(graph, damping_factor, solver)
+        return dict(zip(graph.names, ranks.tolist()))
+    if backend != "dict":
+        raise ValueError(f"Unknown backend {backend!r}")
+    if solver != "power":
+        raise ValueError(f"Solver {solver!r} requires the sparse backend")
+
     pagerank = {}
     N = len(corpus)
 
@@ -148,22 +182,26 @@ def iterate_pagerank(corpus, damping_factor):
     for p in corpus:
         pagerank[p] = 1 / N
 
+    # Find the pages that link to each page once. A page without links
+    # is treated as having one link to every page, including itself.
+    incoming = {p: [] for p in corpus}
+    dangling = []
+    for key, links in corpus.items():
+        if not links:
+            dangling.append(key)
+        for link in links:
+            incoming[link].append(key)
+
     while True:
         # Keep the previous pagerank, which won't update.
         prev_pagerank = pagerank.copy()
+        changes = []
+        dangling_sum = sum(prev_pagerank[page] for page in dangling) / N
 
         for p in pagerank:
-            changes = []
-            i = []
-            sum_i = 0
-
-            # Check for which pages, p is in the links.
-            for key, links in corpus.items():
-                if p in links:
-                    i.append(key)
-
             # Compute the sum of PR(i) / NumLinks(i).
-            for page in i:
+            sum_i = dangling_sum
+            for page in incoming[p]:
                 sum_i += prev_pagerank[page] / len(corpus[page])
 
             pagerank[p] = ((1 - damping_factor) / N) + (damping_factor * sum_i)
@@ -0,0 +1,90 @@
+import argparse
+
+import numpy as np
+
+from graph import Graph
+from pagerank import DAMPING, crawl
+import sparse
+
+# Number of teleport distributions iterated together by batch_pagerank
+BATCH_SIZE = 64
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus for surfers who jump to a "
+                    "set of seed pages rather than to any page."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--seeds", nargs="+", action="append", required=True,
+                        help="seed pages; repeat for several sets of seeds")
+    args = parser.parse_args()
+
+    graph = Graph.from_corpus(crawl(args.corpus))
+    ranks = batch_pagerank(graph, DAMPING, args.seeds)
+    for column, seeds in enumerate(args.seeds):
+        print(f"Personalized PageRank Results (seeds: {', '.join(seeds)})")
+        for k in sorted(range(len(graph)), key=graph.names.__getitem__):
+            print(f"  {graph.names[k]}: {ranks[k, column]:.4f}")
+
+
+def personalized_pagerank(corpus, damping_factor, seeds):
+    """
+    Return PageRank values for each page of `corpus` for a surfer who,
+    instead of jumping to a page at random, jumps to one of the `seeds`.
+
+    `seeds` is a collection of page names, each equally likely, or a
+    dictionary mapping page names to weights, for example how relevant
+    each page is to a topic. Return a dictionary of ranks like
+    `iterate_pagerank`.
+    """
+    graph = Graph.from_corpus(corpus)
+    ranks, _ = sparse.personalized_iteration(
+        graph, damping_factor, teleport_matrix(graph, [seeds])[:, 0]
+    )
+    return dict(zip(graph.names, ranks.tolist()))
+
+
+def batch_pagerank(graph, damping_factor, seed_sets, batch_size=BATCH_SIZE):
+    """
+    Return personalized PageRanks of every page of `graph` for each of
+    `seed_sets`, as an array with a column for each set of seeds.
+
+    Up to `batch_size` sets of seeds are ranked together, as columns of a
+    dense block multiplied by the transition matrix once per iteration;
+    the matrix is built only once for all batches.
+    """
+    matrix = sparse.transition_matrix(graph)
+    ranks = np.empty((len(graph), len(seed_sets)))
+    for start in range(0, len(seed_sets), batch_size):
+        seeds = seed_sets[start:start + batch_size]
+        ranks[:, start:start + len(seeds)], _ = sparse.personalized_iteration(
+            graph, damping_factor, teleport_matrix(graph, seeds),
+            matrix=matrix
+        )
+    return ranks
+
+
+def teleport_matrix(graph, seed_sets):
+    """
+    Return an array with a teleport distribution over the pages of `graph`
+    as each column, one for each of `seed_sets`. Each set of seeds is a
+    collection of page names, or a dictionary of page names to weights.
+    """
+    teleport = np.zeros((len(graph), len(seed_sets)))
+    for column, seeds in enumerate(seed_sets):
+        if not isinstance(seeds, dict):
+            seeds = {name: 1 for name in seeds}
+        for name, weight in seeds.items():
+            if name not in graph.index:
+                raise ValueError(f"{name} is not a page of the corpus")
+            teleport[graph.index[name], column] += weight
+        total = teleport[:, column].sum()
+        if total <= 0:
+            raise ValueError("Seeds must have a positive total weight")
+        teleport[:, column] /= total
+    return teleport
+
+
+if __name__ == "__main__":
+    main()
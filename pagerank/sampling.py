@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+
+# Number of random surfers walking at once, and the fewest steps each takes
+WALKERS = 10000
+MIN_STEPS = 100
+
+# Visits are counted once this many have been recorded
+COUNT_EVERY = 1 << 20
+
+
+def sample_ranks(graph, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Return PageRank estimates for every page of `graph` as an array, by
+    counting the pages visited in about `n` samples of the random surfer
+    model, taken by up to `walkers` surfers moving at once.
+
+    Each surfer starts on a page at random and takes at least `MIN_STEPS`
+    steps, unless `n` is smaller, so that few samples come from before a
+    surfer has moved away from its starting page.
+    """
+    walkers = max(1, min(walkers, n // MIN_STEPS))
+    steps = math.ceil(n / walkers)
+    counts, _ = walk(graph, damping_factor, steps, walkers,
+                     np.random.default_rng(seed))
+    return counts / counts.sum()
+
+
+def walk(graph, damping_factor, steps, walkers, rng, pages=None):
+    """
+    Move `walkers` random surfers `steps` times through `graph` using the
+    random number generator `rng`, starting at `pages` or at random pages.
+    Return the number of samples of each page, counting the starting pages,
+    along with the page each surfer ended on.
+
+    With probability `damping_factor` a surfer follows one of the links of
+    its page, chosen uniformly from the page's slice of `graph.indices`;
+    otherwise, or if the page has no links, it moves to a page at random.
+    """
+    n = len(graph)
+    indptr = graph.indptr
+    indices = graph.indices
+    outdegree = graph.outdegree
+    has_links = ~graph.dangling
+
+    if pages is None:
+        pages = rng.integers(n, size=walkers)
+    counts = np.zeros(n, dtype=np.int64)
+    visits = [pages]
+    recorded = walkers
+
+    for _ in range(steps - 1):
+        follow = (rng.random(walkers) < damping_factor) & has_links[pages]
+        new_pages = rng.integers(n, size=walkers)
+        current = pages[follow]
+        link = (rng.random(len(current)) * outdegree[current]).astype(np.int64)
+        new_pages[follow] = indices[indptr[current] + link]
+        pages = new_pages
+
+        visits.append(pages)
+        recorded += walkers
+        if recorded >= COUNT_EVERY:
+            counts += np.bincount(np.concatenate(visits), minlength=n)
+            visits = []
+            recorded = 0
+
+    if visits:
+        counts += np.bincount(np.concatenate(visits), minlength=n)
+    return counts, pages
@@ -0,0 +1,372 @@
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+# Iteration stops once the ranks change by less than this in total (L1)
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+# Iterations between extrapolations of the ranks
+EXTRAPOLATE_EVERY = 10
+
+# Solvers of `solve`
+SOLVERS = ["power", "gauss-seidel", "quadratic", "adaptive"]
+
+
+def transition_matrix(graph):
+    """
+    Return the sparse matrix `P` of following links in `graph`, where
+    `P[j, i]` is the probability of going from page `i` to page `j`:
+    1 / (number of links of `i`) if `i` links to `j`, and 0 otherwise.
+
+    Columns of dangling pages are all 0; their rank is spread over every
+    page separately, which avoids storing a dense column for each.
+    """
+    n = len(graph)
+    weights = np.zeros(n)
+    np.divide(1, graph.outdegree, out=weights, where=~graph.dangling)
+    links = scipy.sparse.csr_matrix(
+        (np.repeat(weights, graph.outdegree), graph.indices, graph.indptr),
+        shape=(n, n)
+    )
+    return links.T.tocsr()
+
+
+def adjacency_matrix(graph):
+    """
+    Return the sparse matrix `A` of the links of `graph`, where `A[i, j]`
+    is 1 if page `i` links to page `j`, and 0 otherwise.
+    """
+    n = len(graph)
+    return scipy.sparse.csr_matrix(
+        (np.ones(graph.edges), graph.indices, graph.indptr), shape=(n, n)
+    )
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, ranks=None, matrix=None):
+    """
+    Return the PageRank of every page of `graph` as an array, along with
+    the number of iterations taken, by repeatedly applying
+
+        PR = (1 - d) / N + d * (P PR + dangling rank / N)
+
+    until the ranks change by less than `tolerance` in L1 norm, where a
+    page with no links is treated as linking to every page.
+
+    `ranks` may be an initial guess, and `matrix` the transition matrix of
+    `graph` if it has already been built.
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0), 0
+    if matrix is None:
+        matrix = transition_matrix(graph)
+    ranks = start_ranks(n, ranks)
+
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = step(matrix, ranks, graph.dangling, damping_factor)
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
+
+
+def solve(graph, damping_factor, solver="power", **kwargs):
+    """
+    Return the PageRank of every page of `graph` and the number of
+    iterations taken, using the named `solver`:
+        - "power": `power_iteration`
+        - "gauss-seidel": `gauss_seidel`
+        - "quadratic": `extrapolated_iteration`
+        - "adaptive": `adaptive_iteration`
+    Other keyword arguments are passed on to the solver.
+    """
+    if solver == "power":
+        return power_iteration(graph, damping_factor, **kwargs)
+    if solver == "gauss-seidel":
+        return gauss_seidel(graph, damping_factor, **kwargs)
+    if solver == "quadratic":
+        return extrapolated_iteration(graph, damping_factor, **kwargs)
+    if solver == "adaptive":
+        return adaptive_iteration(graph, damping_factor, **kwargs)
+    raise ValueError(f"Unknown solver {solver!r}")
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS, ranks=None, matrix=None):
+    """
+    Return the PageRank of every page of `graph` and the number of sweeps
+    taken, using Gauss-Seidel sweeps: pages are updated in order, and each
+    update already uses the new ranks of the pages before it.
+
+    A sweep is a solve with the lower triangle of I - d P, with the upper
+    triangle and the rank of dangling pages taken from the last sweep.
+    The triangle is factored once, in its natural order so that it needs
+    no fill-in, which makes each solve about as fast as a matrix product.
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0), 0
+    if matrix is None:
+        matrix = transition_matrix(graph)
+    ranks = start_ranks(n, ranks)
+    lower = scipy.sparse.linalg.splu(
+        (scipy.sparse.identity(n) - damping_factor * scipy.sparse.tril(matrix)
+         ).tocsc(),
+        permc_spec="NATURAL", diag_pivot_thresh=0
+    )
+    upper = damping_factor * scipy.sparse.triu(matrix, k=1).tocsr()
+    dangling = graph.dangling
+
+    for iteration in range(1, max_iterations + 1):
+        rhs = upper @ ranks
+        rhs += (damping_factor * ranks[dangling].sum()
+                + 1 - damping_factor) / n
+        new_ranks = lower.solve(rhs)
+        new_ranks /= new_ranks.sum()
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
+
+
+def extrapolated_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                           max_iterations=MAX_ITERATIONS, ranks=None,
+                           matrix=None):
+    """
+    Return the PageRank of every page of `graph` and the number of
+    iterations taken, using power iteration in which the ranks are
+    extrapolated from the last four iterates every `EXTRAPOLATE_EVERY`
+    iterations by `quadratic`, which fits them with the two largest
+    non-principal eigenvectors of the iteration to cancel the
+    slowest-decaying error terms.
+
+    An extrapolation is only kept if a step from it changes the ranks
+    less than the plain step it would replace, so it never slows down
+    convergence; checking costs one extra product per extrapolation.
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0), 0
+    if matrix is None:
+        matrix = transition_matrix(graph)
+    ranks = start_ranks(n, ranks)
+    history = [ranks]
+    candidate = None
+
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = step(matrix, ranks, graph.dangling, damping_factor)
+        change = np.abs(new_ranks - ranks).sum()
+        if candidate is not None:
+            candidate_ranks = step(matrix, candidate, graph.dangling,
+                                   damping_factor)
+            candidate_change = np.abs(candidate_ranks - candidate).sum()
+            if candidate_change < change:
+                history = [candidate]
+                new_ranks = candidate_ranks
+                change = candidate_change
+            candidate = None
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+        history = history[-3:] + [ranks]
+        if iteration % EXTRAPOLATE_EVERY == 0 and len(history) == 4:
+            candidate = quadratic(*history)
+    return ranks, iteration
+
+
+def quadratic(x0, x1, x2, x3):
+    """
+    Return the quadratic extrapolation of the iterates `x0` to `x3`,
+    scaled to sum to 1 (Kamvar et al., 2003).
+    """
+    y = np.stack([x1 - x0, x2 - x0], axis=1)
+    (gamma1, gamma2), *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    gamma3 = 1
+    ranks = (
+        (gamma1 + gamma2 + gamma3) * x1
+        + (gamma2 + gamma3) * x2
+        + gamma3 * x3
+    )
+    if not np.all(np.isfinite(ranks)) or ranks.sum() <= 0:
+        return x3
+    ranks = np.maximum(ranks, 0)
+    return ranks / ranks.sum()
+
+
+def adaptive_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                       max_iterations=MAX_ITERATIONS, ranks=None, matrix=None):
+    """
+    Return the PageRank of every page of `graph` and the number of
+    iterations taken, using power iteration that stops updating pages
+    once they have converged (Kamvar et al., 2003).
+
+    A page is frozen once its rank changes by less than `tolerance / N`
+    in an iteration; frozen pages keep their rank, and only the rows of
+    the transition matrix of pages still changing are multiplied. Those
+    rows are taken from the matrix again whenever the number of changing
+    pages has fallen by a quarter.
+
+    Once the pages still changing have converged, a full step checks
+    every page, so frozen pages that have drifted are noticed: iteration
+    only stops if the full step changes the ranks by less than
+    `tolerance`, and otherwise carries on with every page unfrozen.
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros(0), 0
+    if matrix is None:
+        matrix = transition_matrix(graph)
+    ranks = start_ranks(n, ranks)
+    dangling = graph.dangling
+    threshold = tolerance / n
+
+    active = np.arange(n)
+    rows = matrix
+    for iteration in range(1, max_iterations + 1):
+        teleport = (damping_factor * ranks[dangling].sum()
+                    + 1 - damping_factor) / n
+        new_ranks = ranks.copy()
+        new_ranks[active] = damping_factor * (rows @ ranks) + teleport
+        changes = np.abs(new_ranks[active] - ranks[active])
+        ranks = new_ranks
+        if changes.sum() < tolerance:
+            ranks /= ranks.sum()
+            new_ranks = step(matrix, ranks, dangling, damping_factor)
+            change = np.abs(new_ranks - ranks).sum()
+            ranks = new_ranks
+            if change < tolerance:
+                break
+            active = np.arange(n)
+            rows = matrix
+            continue
+
+        still = changes >= threshold
+        if not still.all():
+            remaining = active[still]
+            if len(remaining) < 0.75 * rows.shape[0]:
+                rows = matrix[remaining]
+                active = remaining
+    return ranks / ranks.sum(), iteration
+
+
+def personalized_iteration(graph, damping_factor, teleport,
+                           tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                           matrix=None):
+    """
+    Return personalized PageRanks of every page of `graph`, and the number
+    of iterations taken, by power iteration in which the surfer jumps to
+    a page drawn from a teleport distribution rather than to any page.
+
+    `teleport` is an array with a column for each distribution, summing
+    to 1, or a single such vector. A page with no links also leads to the
+    teleport distribution. All columns are iterated together, with one
+    sparse-matrix product per iteration, and a column stops being updated
+    once its ranks change by less than `tolerance` in L1 norm.
+
+    Return an array of the same shape as `teleport`.
+    """
+    teleport = np.asarray(teleport, dtype=np.float64)
+    vector = teleport.ndim == 1
+    if vector:
+        teleport = teleport[:, np.newaxis]
+    if matrix is None:
+        matrix = transition_matrix(graph)
+    dangling = graph.dangling
+
+    # Columns still changing are kept together in a compact block, and
+    # copied into `ranks` once they converge.
+    ranks = np.empty_like(teleport)
+    columns = np.arange(teleport.shape[1])
+    current = teleport.copy()
+    block = teleport
+    iteration = 0
+    while len(columns) and iteration < max_iterations:
+        iteration += 1
+        jump = damping_factor * current[dangling].sum(axis=0)
+        jump += 1 - damping_factor
+        new_ranks = matrix @ current
+        new_ranks *= damping_factor
+        scratch = np.multiply(block, jump)
+        new_ranks += scratch
+        np.subtract(new_ranks, current, out=scratch)
+        np.abs(scratch, out=scratch)
+        done = scratch.sum(axis=0) < tolerance
+        current = new_ranks
+
+        if done.any():
+            ranks[:, columns[done]] = current[:, done]
+            columns = columns[~done]
+            current = current[:, ~done]
+            block = block[:, ~done]
+    ranks[:, columns] = current
+
+    return (ranks[:, 0] if vector else ranks), iteration
+
+
+def hits_iteration(graph, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                   matrix=None):
+    """
+    Return the hub and authority scores of every page of `graph` as
+    arrays, along with the number of iterations taken, using HITS
+    (Kleinberg, 1999): a page is a good authority if good hubs link to
+    it, and a good hub if it links to good authorities.
+
+    Each iteration updates both vectors together, with one product with
+    `A` transposed and one with `A`,
+
+        authorities = A^T hubs
+        hubs = A authorities
+
+    each scaled to sum to 1, until neither changes by more than
+    `tolerance` in L1 norm. `matrix` may be the `adjacency_matrix` of
+    `graph` if it has already been built. A graph without links has no
+    hubs or authorities, so every score is 0.
+    """
+    n = len(graph)
+    if n == 0 or graph.edges == 0:
+        return np.zeros(n), np.zeros(n), 0
+    if matrix is None:
+        matrix = adjacency_matrix(graph)
+    transpose = matrix.T.tocsr()
+    hubs = np.full(n, 1 / n)
+    authorities = np.full(n, 1 / n)
+
+    for iteration in range(1, max_iterations + 1):
+        new_authorities = transpose @ hubs
+        new_authorities /= new_authorities.sum()
+        new_hubs = matrix @ new_authorities
+        new_hubs /= new_hubs.sum()
+        change = max(np.abs(new_hubs - hubs).sum(),
+                     np.abs(new_authorities - authorities).sum())
+        hubs = new_hubs
+        authorities = new_authorities
+        if change < tolerance:
+            break
+    return hubs, authorities, iteration
+
+
+def start_ranks(n, ranks=None):
+    """
+    Return a copy of the initial guess `ranks` as an array, or ranks of
+    1 / N for every page if there is none.
+    """
+    if ranks is None:
+        return np.full(n, 1 / n)
+    return np.array(ranks, dtype=np.float64)
+
+
+def step(matrix, ranks, dangling, damping_factor):
+    """
+    Return the ranks after one step of power iteration from `ranks`.
+    """
+    n = len(ranks)
+    new_ranks = matrix @ ranks
+    new_ranks += ranks[dangling].sum() / n
+    new_ranks *= damping_factor
+    new_ranks += (1 - damping_factor) / n
+    return new_ranks